@@ -38,8 +38,8 @@ class AnswersItem(FetchItem):
         """Create an instance of the dataclass from a list os strings.  For simplicity, instead of introspecting
          the dataclass for field types, the function is manually synchronized (similar to __slots__).
         """
-        return AnswersItem(s[0], date.fromisoformat(s[1]), s[2], Path(s[3]), s[4], str_to_bool(s[5]),
-                    Outcome[s[6]], Result[s[7]],
+        return AnswersItem(s[0], date.fromisoformat(s[1]), s[2], Path(s[3]) if s[3] else None, s[4],
+                    str_to_bool(s[5]), Outcome[s[6]], Result[s[7]],
                     s[8], s[9], s[10], s[11], s[12], s[13],
                     date.fromisoformat(s[14]), date.fromisoformat(s[15]) if s[15] else None,
                     date.fromisoformat(s[16]))
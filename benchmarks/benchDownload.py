@@ -0,0 +1,97 @@
+"""Benchmark of the download write path: reading into a reused buffer and writing to an unbuffered descriptor,
+against the previous path of reading a new bytes object per chunk through urllib3 and writing a buffered file.
+
+Downloads large bodies from the stand-in with each path in turn, twice, and reports the CPU and wall time per GB.  Each
+path then downloads the bodies once more with tracemalloc tracing, outside the timed rounds, and reports the peak
+memory allocated above the start of the round, which is the largest transient allocation such as a chunk, and the
+memory blocks and bytes still allocated after the round.  The previous path is restored by replacing the private
+HttpClient method for the duration of its rounds.
+
+Run from the repository root with:
+`python -m benchmarks.benchDownload`
+"""
+import argparse
+from pathlib import Path
+import tempfile
+import time
+import tracemalloc
+from typing import Tuple
+
+from urllib3 import HTTPResponse
+
+from benchmarks.standinServer import StandinServer
+from common.httpClient import HttpClient, _BUFFER_SIZE
+from common.rateLimit import RateLimiter
+
+# _____________________________________________________________________________
+def previous_write_response(self: HttpClient, rsp: HTTPResponse, filepath: Path, rate_limiter: RateLimiter) -> int:
+    with filepath.open('wb', buffering=_BUFFER_SIZE) as rfp:
+        size = 0
+        while chunk := rsp.read(rate_limiter.chunk_size(_BUFFER_SIZE)):
+            rate_limiter.acquire(len(chunk))
+            rfp.write(chunk)
+            size += len(chunk)
+        return size
+
+
+# _____________________________________________________________________________
+def download(client: HttpClient, url: str, filepath: Path, size: int, count: int) -> int:
+    """Returns the bytes downloaded by count downloads of the URL
+    """
+    total = 0
+    for _ in range(count):
+        result = client.download(url, filepath)
+        if result.status != 200 or result.bytes != size:
+            raise RuntimeError(f'Download incomplete: {result}')
+        total += result.bytes
+    return total
+
+
+# _____________________________________________________________________________
+def traced_download(client: HttpClient, url: str, filepath: Path, size: int, count: int) -> Tuple[int, int, int]:
+    """Returns the peak bytes allocated above the start, and the blocks and bytes still allocated after, of count
+    downloads of the URL traced by tracemalloc
+    """
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        start_size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        download(client, url, filepath, size, count)
+        peak_size = tracemalloc.get_traced_memory()[1] - start_size
+        stats = tracemalloc.take_snapshot().compare_to(before, 'filename')
+    finally:
+        tracemalloc.stop()
+    return peak_size, sum(s.count_diff for s in stats), sum(s.size_diff for s in stats)
+
+
+# _____________________________________________________________________________
+def main():
+    parser = argparse.ArgumentParser(description='Download CPU and allocation, previous and current write path')
+    parser.add_argument('--size', type=int, default=256, help='MB per body')
+    parser.add_argument('--count', type=int, default=4, help='bodies per round')
+    args = parser.parse_args()
+
+    size = args.size * 1024 * 1024
+    current_write_response = HttpClient._HttpClient__write_response
+    client = HttpClient()
+    with StandinServer() as server, tempfile.TemporaryDirectory() as output_root:
+        filepath = Path(output_root, 'blob.pdf')
+        url = f'{server.url}/blob?size={size}'
+        write_responses = [('previous', previous_write_response), ('current', current_write_response)]
+        for name, write_response in write_responses * 2:
+            HttpClient._HttpClient__write_response = write_response
+            start_cpu, start_time = time.process_time(), time.perf_counter()
+            total = download(client, url, filepath, size, args.count)
+            cpu, wall, gb = time.process_time() - start_cpu, time.perf_counter() - start_time, total / 1e9
+            print(f'{name:8s}  {gb:.2f}GB  CPU {cpu / gb:.3f}s/GB  wall {wall / gb:.3f}s/GB  {client.pool_stats}')
+        for name, write_response in write_responses:
+            HttpClient._HttpClient__write_response = write_response
+            peak_size, blocks, retained_size = traced_download(client, url, filepath, size, args.count)
+            print(f'{name:8s}  traced  peak allocated {peak_size / 1024:8.1f}KB  '
+                  f'still allocated {blocks} blocks {retained_size / 1024:.1f}KB')
+    HttpClient._HttpClient__write_response = current_write_response
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""Regression benchmark of the peak memory of listing.
+
+Lists the items of the stand-in, from the source (cold) and then from the cached list pages (warm), each in a new
+process, and reports the peak resident set size of the process.  Only listing is run, no files are downloaded.
+
+Run from the repository root with:
+`python -m benchmarks.benchListMemory`
+"""
+import argparse
+from pathlib import Path
+import tempfile
+from typing import Tuple
+
+from benchmarks.benchTools import StandinAppConfig, peak_rss_mb, run_isolated
+from benchmarks.standinServer import StandinServer
+from whitepapers.fetchWhitepaperList import FetchWhitepaperList
+
+_CACHE_AGE_SECS = 10 ** 9
+
+
+# _____________________________________________________________________________
+def build_list(output_root: str, list_url: str, is_warm: bool) -> Tuple[int, float]:
+    """Returns the number of records listed and the peak RSS in MB
+    """
+    app_config = StandinAppConfig(Path(output_root), list_url, {'cache': {'age': _CACHE_AGE_SECS if is_warm else 0}})
+    records = FetchWhitepaperList(app_config).build_list()
+    return len(records), peak_rss_mb()
+
+
+# _____________________________________________________________________________
+def main():
+    parser = argparse.ArgumentParser(description='Peak memory of listing')
+    parser.add_argument('--items', type=int, default=20_000)
+    args = parser.parse_args()
+
+    with StandinServer(items=args.items, list_latency=0) as server, tempfile.TemporaryDirectory() as output_root:
+        for is_warm in [False, True]:
+            count, peak = run_isolated(build_list, output_root, server.list_url, is_warm)
+            print(f'{"warm" if is_warm else "cold"}  {count} records  peak RSS {peak:.1f}MB')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Benchmark of logging from the download threads, written synchronously and through the queue listener.
+
+Threads log debug and info records, like the download threads, to a debug and an info file.  Reports the time the
+threads take to log, and the time until the queue listener has written the remaining records.
+
+Run from the repository root with:
+`python -m benchmarks.benchLogging`
+"""
+import argparse
+import logging
+from pathlib import Path
+import tempfile
+import threading
+import time
+
+from common.logTools import PathFileHandler, start_queue_listener
+
+_logger = logging.getLogger('benchmark')
+
+
+# _____________________________________________________________________________
+def log_records(count: int):
+    for i in range(count):
+        _logger.debug(f'> {i:4d} exists:    {str(True):<5s}: "Some whitepaper name - 2021-01-01.pdf"')
+        if i % 10 == 0:
+            _logger.info(f'> {i:4d} fetching:  "Some whitepaper name - 2021-01-01.pdf" --> "Whitepaper"')
+
+
+# _____________________________________________________________________________
+def main():
+    parser = argparse.ArgumentParser(description='Logging from threads, synchronous and queued')
+    parser.add_argument('--count', type=int, default=20_000, help='debug records per thread')
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+
+    root = logging.getLogger()
+    root.setLevel(logging.DEBUG)
+    formatter = logging.Formatter('%(asctime)s %(levelname)-8s %(name)s: %(message)s')
+    records = args.count * args.threads * 11 // 10
+    for is_queued in [False, True]:
+        with tempfile.TemporaryDirectory() as log_root:
+            root.handlers = []
+            for level, name in [(logging.DEBUG, 'debug.log'), (logging.INFO, 'output.log')]:
+                handler = PathFileHandler(Path(log_root, name), 'w', 'utf-8')
+                handler.setLevel(level)
+                handler.setFormatter(formatter)
+                root.addHandler(handler)
+            listener = start_queue_listener() if is_queued else None
+
+            start_time = time.perf_counter()
+            threads = [threading.Thread(target=log_records, args=(args.count,)) for _ in range(args.threads)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            log_secs = time.perf_counter() - start_time
+            if listener:
+                listener.stop()
+            written_secs = time.perf_counter() - start_time
+            for handler in listener.handlers if listener else root.handlers:
+                handler.close()
+            root.handlers = []
+
+        print(f'{"queued" if is_queued else "synchronous":11s}  {records} records  threads {log_secs:.2f}s '
+              f'({records / log_secs / 1000:.0f}k records/s)  written {written_secs:.2f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Benchmark of the download order policies ("download.order").
+
+Downloads the listed files of the stand-in with a few workers, with each response paced so that a large file started
+late in the run keeps one worker busy after the others are idle.  Each policy downloads into a new output directory
+and reports the download time of a first run, where largest-first gets the sizes from HEAD requests
+("download.probeSizes"), and of a repeat run after the downloads are deleted, where it gets them from the history.
+
+Run from the repository root with:
+`python -m benchmarks.benchOrder`
+"""
+import argparse
+from pathlib import Path
+import shutil
+import tempfile
+import time
+from typing import Tuple
+
+from benchmarks.benchTools import StandinAppConfig, run_isolated
+from benchmarks.standinServer import StandinServer
+from common.fetchFiles import FetchFiles
+from common.fetchOrder import FetchOrder
+from common.workJournal import complete_journal
+from whitepapers.fetchWhitepaperList import FetchWhitepaperList
+
+
+# _____________________________________________________________________________
+def fetch_files(list_url: str, order: str, workers: int) -> Tuple[int, float, float]:
+    """Returns the number of records and the time to download them in a first and a repeat run
+    """
+    with tempfile.TemporaryDirectory() as output_root:
+        app_config = StandinAppConfig(Path(output_root), list_url, {
+            'download': {'workers': workers, 'order': order, 'probeSizes': order == FetchOrder.largest.name}})
+        secs = []
+        for _ in range(2):
+            shutil.rmtree(app_config.downloads_path, ignore_errors=True)
+            records = FetchWhitepaperList(app_config).build_list()
+            start_time = time.perf_counter()
+            FetchFiles(app_config).process(records)
+            secs.append(time.perf_counter() - start_time)
+            complete_journal(app_config)
+        return len(records), *secs
+
+
+# _____________________________________________________________________________
+def main():
+    parser = argparse.ArgumentParser(description='Download time by download order policy')
+    parser.add_argument('--items', type=int, default=120)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--rate', type=int, default=4_000_000, help='bytes per second per response')
+    args = parser.parse_args()
+
+    with StandinServer(items=args.items, rate=args.rate) as server:
+        for order in FetchOrder:
+            count, first_secs, repeat_secs = run_isolated(fetch_files, server.list_url, order.name, args.workers)
+            print(f'{order.name:8s}  {count} records  {args.workers} workers  first run {first_secs:6.2f}s  '
+                  f'repeat run {repeat_secs:6.2f}s')
+
+
+if __name__ == '__main__':
+    main()
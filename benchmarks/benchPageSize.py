@@ -0,0 +1,50 @@
+"""Benchmark of the adaptive list page size ("list.pageSize").
+
+Lists the items of the stand-in, which honours page sizes up to a cap and takes a fixed time per page, with the
+configured fixed page size, then adaptive with probing, then adaptive with the page size remembered from the
+previous run.  Reports the list requests and the listing time.
+
+Run from the repository root with:
+`python -m benchmarks.benchPageSize`
+"""
+import argparse
+from pathlib import Path
+import tempfile
+import time
+from typing import Tuple
+
+from benchmarks.benchTools import StandinAppConfig, count_requests, run_isolated
+from benchmarks.standinServer import StandinServer
+from whitepapers.fetchWhitepaperList import FetchWhitepaperList
+
+
+# _____________________________________________________________________________
+def build_list(output_root: str, list_url: str, is_adaptive: bool) -> Tuple[int, int, float]:
+    """Returns the number of records listed, the list requests and the listing time
+    """
+    app_config = StandinAppConfig(Path(output_root), list_url, {'list': {'pageSize': {'adaptive': is_adaptive}}})
+    requests = count_requests(list_url, app_config)
+    start_time = time.perf_counter()
+    records = FetchWhitepaperList(app_config).build_list()
+    return len(records), requests(), time.perf_counter() - start_time
+
+
+# _____________________________________________________________________________
+def main():
+    parser = argparse.ArgumentParser(description='Listing time with fixed and adaptive page size')
+    parser.add_argument('--items', type=int, default=600)
+    parser.add_argument('--max-page-size', type=int, default=100, help='largest page size honoured')
+    parser.add_argument('--list-latency', type=float, default=0.02, help='seconds per list page')
+    args = parser.parse_args()
+
+    with StandinServer(items=args.items, max_page_size=args.max_page_size, list_latency=args.list_latency) as server:
+        with tempfile.TemporaryDirectory() as fixed_root, tempfile.TemporaryDirectory() as adaptive_root:
+            for case, output_root, is_adaptive in [('fixed size', fixed_root, False),
+                                                   ('adaptive, probing', adaptive_root, True),
+                                                   ('adaptive, remembered', adaptive_root, True)]:
+                count, requests, secs = run_isolated(build_list, output_root, server.list_url, is_adaptive)
+                print(f'{case:20s}  {count} records  {requests:3d} requests  {secs:5.2f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""Benchmark of the connection pool size per host ("download.pool.maxSize").
+
+Downloads the listed files of the stand-in with a fixed number of workers and an increasing pool size, with each
+response paced so that throughput depends on the number of connections in use at once.  Reports the throughput and
+the pool statistics: checkouts, new connections, connections reused and the time workers waited for a connection.
+
+Run from the repository root with:
+`python -m benchmarks.benchPool`
+"""
+import argparse
+from pathlib import Path
+import tempfile
+import time
+from typing import Tuple
+
+from benchmarks.benchTools import StandinAppConfig, run_isolated
+from benchmarks.standinServer import StandinServer
+from common.fetchFiles import FetchFiles
+from whitepapers.fetchWhitepaperList import FetchWhitepaperList
+
+
+# _____________________________________________________________________________
+def fetch_files(list_url: str, workers: int, pool_size: int) -> Tuple[int, float, str]:
+    """Returns the bytes downloaded, the time to download them and the pool statistics
+    """
+    with tempfile.TemporaryDirectory() as output_root:
+        app_config = StandinAppConfig(Path(output_root), list_url, {
+            'download': {'workers': workers, 'pool': {'maxSize': pool_size}}})
+        records = FetchWhitepaperList(app_config).build_list()
+        fd = FetchFiles(app_config)
+        start_time = time.perf_counter()
+        fd.process(records)
+        secs = time.perf_counter() - start_time
+        return fd.stats.bytes, secs, str(fd.pool_stats)
+
+
+# _____________________________________________________________________________
+def main():
+    parser = argparse.ArgumentParser(description='Download throughput by connection pool size')
+    parser.add_argument('--items', type=int, default=60)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--rate', type=int, default=2_000_000, help='bytes per second per response')
+    args = parser.parse_args()
+
+    with StandinServer(items=args.items, rate=args.rate) as server:
+        pool_size = 1
+        while pool_size <= args.workers:
+            size, secs, pool_stats = run_isolated(fetch_files, server.list_url, args.workers, pool_size)
+            print(f'pool {pool_size:2d}  {args.workers} workers  {size / 1e6:6.1f}MB  {secs:6.2f}s  '
+                  f'{size / 1e6 / secs:5.1f}MB/s  {pool_stats}')
+            pool_size *= 2
+
+
+if __name__ == '__main__':
+    main()
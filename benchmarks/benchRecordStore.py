@@ -0,0 +1,67 @@
+"""Benchmark of the memory held by the listed records, as objects and in the columnar record store ("list.columnar").
+
+Builds synthetic whitepaper records and measures the memory allocated to hold them with tracemalloc, and the time
+of a pass over the records that reads each file path twice, as a download does.
+
+Run from the repository root with:
+`python -m benchmarks.benchRecordStore`
+"""
+import argparse
+from datetime import date, timedelta
+from pathlib import Path
+import time
+import tracemalloc
+
+from common.common import Outcome, Result
+from common.recordStore import RecordStore
+from whitepapers.whitepaperTypes import WhitepaperItem
+
+
+# _____________________________________________________________________________
+def build_record(i: int) -> WhitepaperItem:
+    d = date(2020, 1, 1) + timedelta(days=i % 700)
+    filename = f'Title {i} - {d}.pdf'
+    return WhitepaperItem(f'Title {i}', d, filename, Path('Whitepaper', filename), f'https://x/{i}.pdf', True,
+                Outcome.nil, Result.nil, f'wp-{i}', 'pdf^security', ['Whitepaper', 'Guide'][i % 2], None,
+                f'Description of item {i}', f'https://x/{i}', d, d, d, d)
+
+
+# _____________________________________________________________________________
+def read_paths(records) -> float:
+    """Returns the time to read the file path of each record twice
+    """
+    start_time = time.perf_counter()
+    for record in records:
+        if record.filepath.suffix != record.filepath.suffix:
+            raise RuntimeError(f'Path changed: {record}')
+    return time.perf_counter() - start_time
+
+
+# _____________________________________________________________________________
+def main():
+    parser = argparse.ArgumentParser(description='Memory of listed records as objects and columnar')
+    parser.add_argument('--count', type=int, default=100_000, help='number of records')
+    args = parser.parse_args()
+
+    tracemalloc.start()
+    records = [build_record(i) for i in range(args.count)]
+    objects_size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    objects_secs = read_paths(records)
+    del records
+
+    tracemalloc.start()
+    store = RecordStore()
+    for i in range(args.count):
+        store.append(build_record(i))
+    columnar_size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    columnar_secs = read_paths(store)
+
+    print(f'{args.count} records  objects {objects_size / 1e6:.1f}MB  columnar {columnar_size / 1e6:.1f}MB  '
+          f'ratio {objects_size / columnar_size:.2f}  read paths objects {objects_secs:.3f}s  '
+          f'columnar {columnar_secs:.3f}s')
+
+
+if __name__ == '__main__':
+    main()
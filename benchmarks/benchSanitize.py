@@ -0,0 +1,60 @@
+"""Benchmark of the memoised filename sanitising.
+
+Converts the titles and URLs of a synthetic list, with many non-ASCII and reserved characters and, as in the real
+lists, almost all distinct, with the uncached functions, as before the cache, and with the cached functions in a first
+build of the list and in a repeat build, as on the next check of the daemon.  Checks the outputs match.
+
+Run from the repository root with:
+`python -m benchmarks.benchSanitize`
+"""
+import argparse
+import random
+import time
+
+from common.pathTools import sanitize_filename, urlpath_to_pathname
+
+_CHARS = 'abcdefghij KLMN:*|?<>"/\\–—éüñ漢%20  '
+
+
+# _____________________________________________________________________________
+def main():
+    parser = argparse.ArgumentParser(description='Filename sanitising with and without the cache')
+    parser.add_argument('--count', type=int, default=5_000, help='number of titles in the list')
+    parser.add_argument('--duplicates', type=float, default=0.01, help='fraction of titles repeated in the list')
+    parser.add_argument('--builds', type=int, default=20, help='number of list builds timed')
+    args = parser.parse_args()
+
+    rand = random.Random(0)
+    distinct = int(args.count * (1 - args.duplicates))
+    words = [''.join(rand.choice(_CHARS) for _ in range(rand.randint(10, 60))) for _ in range(distinct)]
+    titles = words + [rand.choice(words) for _ in range(args.count - distinct)]
+    rand.shuffle(titles)
+    urls = ['https://docs.aws.amazon.com/' + t for t in titles]
+
+    for name, func, values in [('sanitize_filename', sanitize_filename, titles),
+                               ('urlpath_to_pathname', urlpath_to_pathname, urls)]:
+        start_time = time.perf_counter()
+        for _ in range(args.builds):
+            uncached = [func.__wrapped__(v) for v in values]
+        uncached_secs = (time.perf_counter() - start_time) / args.builds
+
+        first_secs = 0.0
+        for _ in range(args.builds):
+            func.cache_clear()
+            start_time = time.perf_counter()
+            first = [func(v) for v in values]
+            first_secs += time.perf_counter() - start_time
+        first_secs /= args.builds
+
+        start_time = time.perf_counter()
+        for _ in range(args.builds):
+            repeat = [func(v) for v in values]
+        repeat_secs = (time.perf_counter() - start_time) / args.builds
+
+        print(f'{name:20s}  {len(values)} values  uncached {uncached_secs * 1000:6.1f}ms  '
+              f'cached first build {first_secs * 1000:6.1f}ms  repeat build {repeat_secs * 1000:6.1f}ms  '
+              f'{func.cache_info().currsize} entries  outputs match {uncached == first == repeat}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""Helpers shared by the benchmarks: an application configuration pointing at the stand-in server, and running each
+benchmark case in a new process.
+
+Each case runs in a new (spawned) process so that it starts from a clean state, with its own connection pools and its
+own peak memory.
+"""
+import concurrent.futures
+import copy
+import logging
+import multiprocessing
+from pathlib import Path
+import sys
+from typing import Any, Callable, Mapping
+
+from common.appConfig import AppConfig
+from common.httpClient import get_http_client
+from whitepapers.whitepaperAppConfig import WhitepaperAppConfig
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+_APP_PATH = Path(__file__).parents[1] / 'whitepapers' / 'getWhitepapers.py'
+_QUIET_SETTINGS = {'download': {'progress': {'enabled': False}, 'validate': False}}
+
+
+# _____________________________________________________________________________
+def merge_settings(settings: Mapping[str, Any], overrides: Mapping[str, Any]) -> dict:
+    merged = copy.deepcopy(dict(settings))
+    for key, value in overrides.items():
+        if isinstance(value, Mapping) and isinstance(merged.get(key, None), Mapping):
+            merged[key] = merge_settings(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+# _____________________________________________________________________________
+class StandinAppConfig(WhitepaperAppConfig):
+    """Whitepapers configuration listing from the stand-in server into output_root, with settings overridden by
+    a mapping shaped like the configuration file.  The list is not cached unless "cache.age" is overridden.
+    """
+
+    # _____________________________________________________________________________
+    def __init__(self, output_root: Path, list_url: str, overrides: Mapping[str, Any] = None):
+        super().__init__(_APP_PATH, output_root)
+        overrides = merge_settings(_QUIET_SETTINGS, overrides or {})
+        self._source_url = list_url
+        self._cache_age_sec = int(overrides.get('cache', {}).get('age', 0))
+        self._source_parameters = merge_settings(self._source_parameters, overrides.get('remote', {}))
+        self._list_settings = merge_settings(self._list_settings, overrides.get('list', {}))
+        self._download_settings = merge_settings(self._download_settings, overrides.get('download', {}))
+
+
+# _____________________________________________________________________________
+def count_requests(path: str, app_config: AppConfig) -> Callable[[], int]:
+    """Count the requests, from the process HTTP client, to URLs containing path.  Returns the counter.
+    """
+    counts = [0]
+
+    def hook(event: str, info: Mapping[str, Any]):
+        if event == 'request' and path in info['url']:
+            counts[0] += 1
+
+    get_http_client(app_config.download_settings).add_hook(hook)
+    return lambda: counts[0]
+
+
+# _____________________________________________________________________________
+def peak_rss_mb() -> float:
+    """Returns the peak resident set size of the process, in MB, or NaN where not available
+    """
+    if not resource:
+        return float('nan')
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+# _____________________________________________________________________________
+def run_isolated(func: Callable, *args) -> Any:
+    """Returns func(*args) run in a new process
+    """
+    context = multiprocessing.get_context('spawn')
+    with concurrent.futures.ProcessPoolExecutor(max_workers=1, mp_context=context,
+                                                initializer=_initialize_process) as executor:
+        return executor.submit(func, *args).result()
+
+
+# _____________________________________________________________________________
+def _initialize_process():
+    logging.basicConfig(level=logging.WARNING, format='%(levelname)-8s %(name)s: %(message)s')
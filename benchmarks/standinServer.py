@@ -0,0 +1,226 @@
+"""Local stand-in for the directory API and document hosts, used by the benchmarks.
+
+The list endpoint pages items like the remote API, honouring page sizes up to a cap and reporting the items returned
+in "metadata.count".  Locales other than "en_US" list a second set of items, offset by half the item count, to stand
+in for further sources.  Each item links a PDF by a redirect, as the documents are hosted on a CDN.  File sizes are
+random with a fixed seed, from a Pareto distribution of 40KB minimum, capped at 16MB: most files are small and a few
+are very large.
+
+Routes:
+- /api/dirs/items/search    list page, paged by "size" and "page"
+- /docs/{i}.pdf             redirect to /cdn/{i}.pdf
+- /cdn/{i}.pdf              PDF document of item i, paced to "rate" bytes per second per response
+- /blob?size=N              N bytes, written in 4MB chunks
+
+Options "faults" returns a 404 for one document in 13 and an HTML error page for one in 11, "truncate" sends half of
+each document and closes the connection, and "nopdf" drops the PDF link of one item in 9.
+
+Run standalone with:
+`python -m benchmarks.standinServer --port 8765 --items 600`
+"""
+import argparse
+import json
+import random
+import socket
+import subprocess
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+from urllib.parse import parse_qs, urlparse
+
+_LIST_PATH = '/api/dirs/items/search'
+_CHUNK_SIZE = 64 * 1024
+_BLOB_CHUNK_SIZE = 4 * 1024 * 1024
+_WORDS = ['security', 'lambda', 'storage', 'network', 'cost', 'migration', 'serverless', 'database']
+
+
+# _____________________________________________________________________________
+def build_sizes(count: int) -> List[int]:
+    rand = random.Random(3)
+    return [int(min(40_000 * rand.paretovariate(1.1), 16_000_000)) for _ in range(count)]
+
+
+# _____________________________________________________________________________
+def build_pdf(i: int, size: int) -> bytes:
+    """Returns a one page PDF with a line of text, padded by a comment to about size bytes
+    """
+    text = f'Whitepaper {i} about {_WORDS[i % 8]} and {_WORDS[(i * 3) % 8]}'
+    stream = f'BT /F1 12 Tf 72 720 Td ({text}) Tj ET'.encode()
+    objects = [b'<< /Type /Catalog /Pages 2 0 R >>', b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+               b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R '
+               b'/Resources << /Font << /F1 5 0 R >> >> >>',
+               b'<< /Length ' + str(len(stream)).encode() + b' >>\nstream\n' + stream + b'\nendstream',
+               b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>']
+    body = b'%PDF-1.4\n%' + b'x' * size + b'\n'
+    offsets = []
+    for n, obj in enumerate(objects, 1):
+        offsets.append(len(body))
+        body += f'{n} 0 obj\n'.encode() + obj + b'\nendobj\n'
+    xref = len(body)
+    body += f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode()
+    body += b''.join(f'{o:010d} 00000 n \n'.encode() for o in offsets)
+    body += f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode()
+    return body
+
+
+# _____________________________________________________________________________
+class StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    options: argparse.Namespace = None
+    sizes: List[int] = []
+
+    # _____________________________________________________________________________
+    def log_message(self, format, *args):
+        pass
+
+    # _____________________________________________________________________________
+    def __send(self, code: int, body: bytes = b'', content_type: str = 'application/octet-stream', headers=()):
+        self.send_response(code)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Content-Type', content_type)
+        for key, value in headers:
+            self.send_header(key, value)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    # _____________________________________________________________________________
+    def __item(self, i: int, locale: str):
+        port, options = self.server.server_address[1], self.options
+        date = f'2021-{(i % 12) + 1:02d}-{(i % 27) + 1:02d}T00:00:00+0000'
+        pdf_link = '' if 'nopdf' in options.modes and i % 9 == 8 else \
+            f'<a href="http://localhost:{port}/docs/{i}.pdf" target="_blank">PDF</a> '
+        return {'item': {'name': f'wp-{i}', 'locale': locale, 'dateCreated': date, 'additionalFields': {
+            'docTitle': f'Whitepaper – number {i}: test', 'contentType': ['Whitepaper', 'Guide'][i % 2],
+            'primaryURL': f'http://localhost:{port}/wp/{i}', 'datePublished': date, 'sortDate': date,
+            'description': f'<p>Desc {i}</p><p>{pdf_link}<a href="http://x/security" target="_blank">Security</a>'}}}
+
+    # _____________________________________________________________________________
+    def __list(self, query):
+        count = self.options.items
+        size = min(int(query.get('size', ['15'])[0]), self.options.max_page_size)
+        page = int(query.get('page', ['0'])[0])
+        locale = query.get('item.locale', ['en_US'])[0]
+        offset = 0 if locale == 'en_US' else count // 2
+        items = [self.__item(offset + i, locale) for i in range(page * size, min(count, (page + 1) * size))]
+        time.sleep(self.options.list_latency)
+        body = json.dumps({'metadata': {'count': len(items), 'totalHits': count}, 'items': items}).encode()
+        self.__send(200, body, 'application/json')
+
+    # _____________________________________________________________________________
+    def __document(self, i: int):
+        time.sleep(self.options.file_latency)
+        if 'faults' in self.options.modes and i % 11 == 3:
+            return self.__send(200, b'<html>error</html>', 'application/pdf')
+        body = build_pdf(i, self.sizes[i])
+        if self.command == 'HEAD':
+            return self.__send(200, body, 'application/pdf')
+        length = len(body)
+        if 'truncate' in self.options.modes:
+            body, self.close_connection = body[:length // 2], True
+        self.send_response(200)
+        self.send_header('Content-Length', str(length))
+        self.send_header('Content-Type', 'application/pdf')
+        self.end_headers()
+        view, rate = memoryview(body), self.options.rate
+        for offset in range(0, len(view), _CHUNK_SIZE):
+            self.wfile.write(view[offset:offset + _CHUNK_SIZE])
+            if rate:
+                time.sleep(_CHUNK_SIZE / rate)
+
+    # _____________________________________________________________________________
+    def __blob(self, query):
+        size = int(query.get('size', ['0'])[0])
+        self.send_response(200)
+        self.send_header('Content-Length', str(size))
+        self.send_header('Content-Type', 'application/pdf')
+        self.end_headers()
+        chunk = memoryview(b'x' * min(size, _BLOB_CHUNK_SIZE))
+        for offset in range(0, size, _BLOB_CHUNK_SIZE):
+            self.wfile.write(chunk[:min(_BLOB_CHUNK_SIZE, size - offset)])
+
+    # _____________________________________________________________________________
+    def do_HEAD(self):
+        self.do_GET()
+
+    # _____________________________________________________________________________
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path == _LIST_PATH:
+            return self.__list(query)
+        if url.path == '/blob':
+            return self.__blob(query)
+        if url.path.startswith('/docs/'):
+            i = int(url.path.split('/')[-1].split('.')[0])
+            if 'faults' in self.options.modes and i % 13 == 5:
+                return self.__send(404)
+            port = self.server.server_address[1]
+            return self.__send(301, headers=[('Location', f'http://localhost:{port}/cdn/{i}.pdf')])
+        if url.path.startswith('/cdn/'):
+            return self.__document(int(url.path.split('/')[-1].split('.')[0]) % self.options.items)
+        self.__send(404)
+
+
+# _____________________________________________________________________________
+class StandinServer(object):
+    """Runs the stand-in server in a child process, so it does not share the interpreter lock with the benchmark
+    """
+
+    # _____________________________________________________________________________
+    def __init__(self, items: int = 600, max_page_size: int = 100, list_latency: float = 0.02,
+                 file_latency: float = 0.05, rate: int = 0, modes: List[str] = None):
+        with socket.socket() as s:
+            s.bind(('localhost', 0))
+            self.port = s.getsockname()[1]
+        self._args = ['--port', str(self.port), '--items', str(items), '--max-page-size', str(max_page_size),
+                      '--list-latency', str(list_latency), '--file-latency', str(file_latency), '--rate', str(rate),
+                      '--modes', ','.join(modes or [])]
+        self._process = None
+
+    # _____________________________________________________________________________
+    @property
+    def url(self) -> str:
+        return f'http://localhost:{self.port}'
+
+    # _____________________________________________________________________________
+    @property
+    def list_url(self) -> str:
+        return self.url + _LIST_PATH
+
+    # _____________________________________________________________________________
+    def __enter__(self):
+        self._process = subprocess.Popen([sys.executable, '-m', 'benchmarks.standinServer', *self._args])
+        for _ in range(100):
+            try:
+                socket.create_connection(('localhost', self.port), timeout=1).close()
+                return self
+            except OSError:
+                time.sleep(0.05)
+        raise RuntimeError(f'Stand-in server not listening on port {self.port}')
+
+    # _____________________________________________________________________________
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._process.kill()
+        self._process.wait()
+
+
+# _____________________________________________________________________________
+def main():
+    parser = argparse.ArgumentParser(description='Stand-in for the directory API and document hosts')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--items', type=int, default=600, help='number of list items')
+    parser.add_argument('--max-page-size', type=int, default=100, help='largest page size honoured')
+    parser.add_argument('--list-latency', type=float, default=0.02, help='seconds per list page')
+    parser.add_argument('--file-latency', type=float, default=0.05, help='seconds before each document')
+    parser.add_argument('--rate', type=int, default=0, help='document bytes per second per response, 0 unpaced')
+    parser.add_argument('--modes', type=lambda s: [m for m in s.split(',') if m], default=[],
+                        help='comma separated: faults, truncate, nopdf')
+    StandinHandler.options = parser.parse_args()
+    StandinHandler.sizes = build_sizes(StandinHandler.options.items)
+    ThreadingHTTPServer(('localhost', StandinHandler.options.port), StandinHandler).serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -37,8 +37,8 @@ class BuildersItem(FetchItem):
         """Create an instance of the dataclass from a list os strings.  For simplicity, instead of introspecting
          the dataclass for field types, the function is manually synchronized (similar to __slots__).
         """
-        return BuildersItem(s[0], date.fromisoformat(s[1]), s[2], Path(s[3]), s[4], str_to_bool(s[5]),
-                    Outcome[s[6]], Result[s[7]],
+        return BuildersItem(s[0], date.fromisoformat(s[1]), s[2], Path(s[3]) if s[3] else None, s[4],
+                    str_to_bool(s[5]), Outcome[s[6]], Result[s[7]],
                     s[8], s[9],
                     date.fromisoformat(s[10]) if s[10] else None, date.fromisoformat(s[11]),
                     s[12], s[13], s[14], s[15])
@@ -5,11 +5,19 @@ import time
 
 
 from common.appConfig import AppConfig
+from common.archiveStore import restore_files
 from common.cleanup import CleanOutput
-from common.common import initialize_logger
+from common.listSnapshot import ListSnapshot
+from common.common import initialize_logger, parse_arguments
+from common.metadataIndex import update_metadata, query_metadata
 from common.reporting import Reporting
+from common.shardSync import fetch_shard, merge_shards, remove_shards
 from common.logTools import MessageFormatter, PathFileHandler
 from common.fetchFiles import FetchFiles
+from common.syncPlan import SyncPlanner
+from common.textIndex import index_documents, search_documents
+from common.traceAnalyzer import report_traces
+from common.workJournal import complete_journal
 from builders.fetchBuildersList import FetchBuildersList
 from builders.buildersAppConfig import BuildersAppConfig
 from builders.buildersTypes import BuildersItem
@@ -20,30 +28,80 @@ _CSV_BACKUP_SUFFIX = '.bak.csv'
 
 
 # _____________________________________________________________________________
-def process(app_config: AppConfig):
+def process(app_config: AppConfig, is_reconcile: bool = False):
     _logger.debug('process')
     _logger.info(f'Downloads path: "{app_config.downloads_path}"')
 
     fdl = FetchBuildersList(app_config)
     fetch_records = fdl.build_list()
+    snapshot = ListSnapshot(app_config, fdl.fingerprints)
+    list_delta = snapshot.diff(fetch_records, is_reconcile)
 
-    delete_records = []
+    delete_records, fetch_stats = [], None
     try:
         fd = FetchFiles(app_config)
+        fetch_stats = fd.stats
         fd.process(fetch_records)
+        index_documents(fetch_records, app_config)
 
+        co = CleanOutput(app_config)
+        fetch_paths = {r.filepath for r in fetch_records}
+        delete_records = co.process(fetch_paths, list_delta.stale_paths if list_delta else None)
+    finally:
+        reporting = Reporting(fetch_records, BuildersItem, delete_records, app_config, fetch_stats)
+        reporting.export_fetch_results()
+        reporting.export_extras_results()
+        update_metadata(fetch_records, BuildersItem, app_config)
+        _logger.info('\n' + reporting.build_summary())
+    snapshot.save(fetch_records)
+    complete_journal(app_config)
+
+
+# _____________________________________________________________________________
+def plan(app_config: AppConfig, is_probe: bool = True):
+    _logger.debug('plan')
+    _logger.info(f'Output path: "{app_config.downloads_path}"')
+
+    fdl = FetchBuildersList(app_config)
+    fetch_records = fdl.build_list()
+    SyncPlanner(app_config, is_probe).process(fetch_records)
+
+
+# _____________________________________________________________________________
+def shard(app_config: AppConfig, index: int, count: int):
+    _logger.debug('shard')
+    _logger.info(f'Output path: "{app_config.downloads_path}"')
+
+    fdl = FetchBuildersList(app_config)
+    fetch_records = fdl.build_list()
+    fetch_shard(fetch_records, index, count, app_config, fdl.fingerprints)
+
+
+# _____________________________________________________________________________
+def merge(app_config: AppConfig, count: int):
+    _logger.debug('merge')
+    _logger.info(f'Output path: "{app_config.downloads_path}"')
+
+    fetch_records, fetch_stats, fingerprints = merge_shards(count, BuildersItem, app_config)
+    delete_records = []
+    try:
+        index_documents(fetch_records, app_config)
         co = CleanOutput(app_config)
         fetch_paths = {r.filepath for r in fetch_records}
         delete_records = co.process(fetch_paths)
     finally:
-        reporting = Reporting(fetch_records, BuildersItem, delete_records, app_config)
+        reporting = Reporting(fetch_records, BuildersItem, delete_records, app_config, fetch_stats)
         reporting.export_fetch_results()
         reporting.export_extras_results()
+        update_metadata(fetch_records, BuildersItem, app_config)
         _logger.info('\n' + reporting.build_summary())
+    ListSnapshot(app_config, fingerprints).save(fetch_records)
+    remove_shards(count, app_config)
 
 
 # _____________________________________________________________________________
 def main():
+    args = parse_arguments()
     start_time = time.time()
     app_path = Path(__file__)
     try:
@@ -53,7 +111,23 @@ def main():
         _logger.info(f'Now: {start_datetime.strftime("%a  %d-%b-%y  %I:%M:%S %p")}')
 
         # Run application
-        process(BuildersAppConfig(app_path, app_path.parents[1]))
+        app_config = BuildersAppConfig(app_path, app_path.parents[1])
+        if args.plan:
+            plan(app_config, args.probe)
+        elif args.search:
+            search_documents(args.search, app_config)
+        elif args.restore:
+            restore_files(args.restore, args.restore_to, app_config)
+        elif args.shard:
+            shard(app_config, *args.shard)
+        elif args.merge:
+            merge(app_config, args.merge)
+        elif args.trace_report:
+            report_traces(app_config, args.since, args.until)
+        elif args.where or args.since or args.until:
+            query_metadata(args.where, args.since, args.until, BuildersItem, app_config)
+        else:
+            process(app_config, args.reconcile)
     except Exception as ex:
         _logger.exception('Catch all exception')
     finally:
@@ -24,8 +24,10 @@ class AppConfig(ABC):
         # Folders
         self._downloads_path = Path(self._output_root, 'downloads', self._name).resolve()
         self._archive_path = Path(self._output_root, 'archive', self._name).resolve()
+        self._restore_path = Path(self._output_root, 'restored', self._name).resolve()
         self._cache_root = Path(self._output_root, 'cache')
         self._cache_path = Path(self._cache_root, self._name).resolve()
+        self._shards_path = Path(self._cache_root, 'shards', self._name).resolve()
 
         # Files
         self._summary_file_path = Path(self._cache_path, self._name + '.summary.json').resolve()
@@ -34,6 +36,24 @@ class AppConfig(ABC):
         self._report_file_path = Path(self._cache_root,
                     f'{self._name}.report.{date.today().strftime("%y-%m-%d")}.csv').resolve()
         self._extras_file_path = Path(self._cache_root, f'{self._name}.extra.csv').resolve()
+        self._history_file_path = Path(self._cache_root, f'{self._name}.history.json').resolve()
+        self._snapshot_file_path = Path(self._cache_root, f'{self._name}.snapshot.json').resolve()
+        self._journal_file_path = Path(self._cache_root, f'{self._name}.journal.jsonl').resolve()
+        self._negative_cache_file_path = Path(self._cache_root, f'{self._name}.negative.json').resolve()
+        self._redirect_cache_file_path = Path(self._cache_root, f'{self._name}.redirect.json').resolve()
+        self._page_size_cache_file_path = Path(self._cache_root, f'{self._name}.pagesize.json').resolve()
+        self._trace_file_path = Path(self._cache_root, 'traces',
+                    f'{self._name}.trace.{date.today().strftime("%y-%m-%d")}.jsonl').resolve()
+        self._text_index_file_path = Path(self._cache_root, f'{self._name}.index.sqlite').resolve()
+        self._metadata_index_file_path = Path(self._cache_root, f'{self._name}.metadata.sqlite').resolve()
+        self._plan_file_path = Path(self._cache_root,
+                    f'{self._name}.plan.{date.today().strftime("%y-%m-%d")}.csv').resolve()
+
+        # Settings, overridden by the application configuration
+        self._sources = []
+        self._list_settings = {}
+        self._download_settings = {}
+        self._index_settings = {}
 
         # Ensure directories pre-exist
         self._downloads_path.mkdir(parents=True, exist_ok=True)
@@ -58,16 +78,44 @@ class AppConfig(ABC):
     def source_parameters(self):
         raise NotImplementedError('source_parameters')
 
+    # _____________________________________________________________________________
+    @property
+    def sources(self):
+        """List parameters of each source, such as a directory and locale, listed concurrently.  Each source
+        overrides the source parameters, and if there are none the source parameters are the only source.
+        """
+        return [{**self.source_parameters, **s} for s in self._sources] or [self.source_parameters]
+
     # _____________________________________________________________________________
     @property
     def cache_age_sec(self):
         raise NotImplementedError('cache_age_sec')
 
+    # _____________________________________________________________________________
+    @property
+    def list_settings(self):
+        return self._list_settings
+
+    # _____________________________________________________________________________
+    @property
+    def download_settings(self):
+        return self._download_settings
+
+    # _____________________________________________________________________________
+    @property
+    def index_settings(self):
+        return self._index_settings
+
     # _____________________________________________________________________________
     @property
     def cache_path(self):
         return self._cache_path
 
+    # _____________________________________________________________________________
+    @property
+    def shards_path(self):
+        return self._shards_path
+
     # _____________________________________________________________________________
     @property
     def downloads_path(self):
@@ -78,6 +126,11 @@ class AppConfig(ABC):
     def archive_path(self):
         return self._archive_path
 
+    # _____________________________________________________________________________
+    @property
+    def restore_path(self):
+        return self._restore_path
+
     # _____________________________________________________________________________
     @property
     def summary_file_path(self):
@@ -97,3 +150,53 @@ class AppConfig(ABC):
     @property
     def extras_file_path(self):
         return self._extras_file_path
+
+    # _____________________________________________________________________________
+    @property
+    def history_file_path(self):
+        return self._history_file_path
+
+    # _____________________________________________________________________________
+    @property
+    def snapshot_file_path(self):
+        return self._snapshot_file_path
+
+    # _____________________________________________________________________________
+    @property
+    def journal_file_path(self):
+        return self._journal_file_path
+
+    # _____________________________________________________________________________
+    @property
+    def negative_cache_file_path(self):
+        return self._negative_cache_file_path
+
+    # _____________________________________________________________________________
+    @property
+    def redirect_cache_file_path(self):
+        return self._redirect_cache_file_path
+
+    # _____________________________________________________________________________
+    @property
+    def page_size_cache_file_path(self):
+        return self._page_size_cache_file_path
+
+    # _____________________________________________________________________________
+    @property
+    def trace_file_path(self):
+        return self._trace_file_path
+
+    # _____________________________________________________________________________
+    @property
+    def plan_file_path(self):
+        return self._plan_file_path
+
+    # _____________________________________________________________________________
+    @property
+    def text_index_file_path(self):
+        return self._text_index_file_path
+
+    # _____________________________________________________________________________
+    @property
+    def metadata_index_file_path(self):
+        return self._metadata_index_file_path
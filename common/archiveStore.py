@@ -0,0 +1,131 @@
+"""Versioned archive of files retired from the downloads folder.
+
+Each file is stored once by the SHA-256 hash of its content, gzip compressed, as "objects/<hh>/<hash>.gz".  A CSV
+index records every retirement with the original path, retirement date and collection.  Thus revisions of a file
+with the same name do not overwrite one another and archive disk use grows with unique content only.
+"""
+import csv
+from dataclasses import dataclass
+from datetime import date
+import gzip
+import hashlib
+import logging
+import os
+from pathlib import Path
+import shutil
+from typing import List
+
+from common.appConfig import AppConfig
+
+_logger = logging.getLogger(__name__)
+_BUFFER_SIZE = 1024 * 1024
+_INDEX_FILENAME = 'index.csv'
+
+
+# _____________________________________________________________________________
+@dataclass
+class ArchiveEntry:
+    __slots__ = ['hash', 'filename', 'filepath', 'dateRetired', 'collection', 'size']
+    hash: str
+    filename: str
+    filepath: str
+    dateRetired: date
+    collection: str
+    size: int
+
+    # _____________________________________________________________________________
+    @staticmethod
+    def from_string(s: List[str]):
+        return ArchiveEntry(s[0], s[1], s[2], date.fromisoformat(s[3]), s[4], int(s[5]))
+
+
+# _____________________________________________________________________________
+class ArchiveStore:
+
+    # _____________________________________________________________________________
+    def __init__(self, archive_path: Path, collection: str):
+        _logger.debug(f'__init__ "{archive_path}"')
+        self._archive_path = archive_path
+        self._collection = collection
+        self._objects_path = Path(archive_path, 'objects')
+        self._index_path = Path(archive_path, _INDEX_FILENAME)
+
+    # _____________________________________________________________________________
+    def __object_path(self, file_hash: str) -> Path:
+        return Path(self._objects_path, file_hash[:2], file_hash + '.gz')
+
+    # _____________________________________________________________________________
+    @staticmethod
+    def file_hash(file_path: Path) -> str:
+        sha = hashlib.sha256()
+        with file_path.open('rb') as fp:
+            while chunk := fp.read(_BUFFER_SIZE):
+                sha.update(chunk)
+        return sha.hexdigest()
+
+    # _____________________________________________________________________________
+    def put(self, file_path: Path, rel_path: Path) -> ArchiveEntry:
+        """Store the file content, if not already stored, and add an index entry.  The file is not removed.
+        """
+        file_hash = self.file_hash(file_path)
+        object_path = self.__object_path(file_hash)
+        if not object_path.exists():
+            object_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = object_path.with_suffix('.tmp')
+            with file_path.open('rb') as fin, gzip.open(tmp_path, 'wb') as fout:
+                shutil.copyfileobj(fin, fout, _BUFFER_SIZE)
+            os.replace(tmp_path, object_path)
+        else:
+            _logger.debug(f'Archive has content: "{file_path.name}" {file_hash[:12]}')
+
+        entry = ArchiveEntry(file_hash, file_path.name, rel_path.as_posix(), date.today(), self._collection,
+                    file_path.stat().st_size)
+        is_new_index = not self._index_path.exists()
+        with self._index_path.open(mode='a', newline='') as out:
+            csv_writer = csv.writer(out, quoting=csv.QUOTE_MINIMAL)
+            if is_new_index:
+                csv_writer.writerow(ArchiveEntry.__slots__)
+            csv_writer.writerow([entry.hash, entry.filename, entry.filepath, entry.dateRetired, entry.collection,
+                                 entry.size])
+        return entry
+
+    # _____________________________________________________________________________
+    def entries(self) -> List[ArchiveEntry]:
+        if not self._index_path.exists():
+            return []
+        with self._index_path.open(mode='r', newline='') as rp:
+            csv_reader = csv.reader(rp)
+            next(csv_reader, None)  # skip csv header
+            return [ArchiveEntry.from_string(line) for line in csv_reader]
+
+    # _____________________________________________________________________________
+    def restore(self, match: str, dest_path: Path) -> List[Path]:
+        """Restore entries whose hash starts with, or file path contains, match (case insensitive) into the
+        destination folder keeping the original relative path.  The latest retirement of a path is restored.
+        """
+        match = match.lower()
+        selected = {}
+        for entry in self.entries():
+            if entry.hash.startswith(match) or match in entry.filepath.lower():
+                selected[entry.filepath] = entry
+
+        restored_paths = []
+        for entry in selected.values():
+            restore_path = Path(dest_path, entry.filepath)
+            restore_path.parent.mkdir(parents=True, exist_ok=True)
+            with gzip.open(self.__object_path(entry.hash), 'rb') as fin, restore_path.open('wb') as fout:
+                shutil.copyfileobj(fin, fout, _BUFFER_SIZE)
+            _logger.info(f'Restored: {entry.dateRetired}  "{restore_path}"')
+            restored_paths.append(restore_path)
+
+        return restored_paths
+
+
+# _____________________________________________________________________________
+def restore_files(match: str, dest_path: Path, app_config: AppConfig) -> List[Path]:
+    _logger.debug('restore_files')
+    dest_path = dest_path or app_config.restore_path
+    store = ArchiveStore(app_config.archive_path, app_config.name)
+    restored_paths = store.restore(match, dest_path)
+    _logger.info(f'Restored {len(restored_paths)} files to "{dest_path}"')
+    return restored_paths
@@ -4,6 +4,7 @@ import os
 from pathlib import Path
 from typing import List, Set
 
+from common.archiveStore import ArchiveStore
 from common.common import DeleteRecord, Outcome, Result
 from common.appConfig import AppConfig
 from common.pathTools import is_parent
@@ -20,14 +21,13 @@ class CleanOutput:
         self._app_config = app_config
 
     # _____________________________________________________________________________
-    def __delete_empty_files(self) -> List[DeleteRecord]:
+    def __delete_empty_files(self, file_paths: List[Path]) -> List[DeleteRecord]:
         _logger.debug('__delete_empty_files')
 
         # Check for extra or empty files
-        file_paths = sorted(self._app_config.downloads_path.glob('**/*.*'))
         delete_records = []
         for file_path in file_paths:
-            if file_path.stat().st_size == 0:
+            if file_path.exists() and file_path.stat().st_size == 0:
                 _logger.warning(f'- Delete empty file: "{file_path.relative_to(self._app_config.downloads_path)}"')
                 delete_record = DeleteRecord(file_path.parent.name, date.today(), file_path.name, file_path,
                             Outcome.deleted, Result.error)
@@ -41,30 +41,43 @@ class CleanOutput:
         return delete_records
 
     # _____________________________________________________________________________
-    def __archive_extra_files(self, fetch_paths: Set[Path]) -> List[DeleteRecord]:
-        _logger.debug('__archive_extra_files')
+    def find_extra_files(self, fetch_paths: Set[Path], local_file_paths: List[Path] = None) -> List[Path]:
+        """Returns local files in the downloads folder, or the local file paths if given, not in the fetch paths.
+        These are the files to be archived.
+        """
+        _logger.debug('find_extra_files')
 
         # Derive file paths from records and local directory
-        local_file_paths = sorted(self._app_config.downloads_path.rglob('*.*'))
+        if local_file_paths is None:
+            local_file_paths = sorted(self._app_config.downloads_path.rglob('*.*'))
         _logger.debug(f'Number files: local, remote: {len(local_file_paths)}, {len(fetch_paths)}')
 
-        archive_file_path = self._app_config.archive_path
         archive_file_paths = []
         for file_path in local_file_paths:
             if file_path not in fetch_paths and not is_parent(self._app_config.archive_path, file_path):
                 archive_file_paths.append(file_path)
 
+        return archive_file_paths
+
+    # _____________________________________________________________________________
+    def __archive_extra_files(self, fetch_paths: Set[Path], local_file_paths: List[Path]) -> List[DeleteRecord]:
+        _logger.debug('__archive_extra_files')
+
+        archive_file_paths = self.find_extra_files(fetch_paths, local_file_paths)
+
         delete_records = []
         if archive_file_paths:
             self._app_config.archive_path.mkdir(parents=True, exist_ok=True)
+            store = ArchiveStore(self._app_config.archive_path, self._app_config.name)
             for file_path in archive_file_paths:
                 _logger.info(f'-      archiving: "{file_path.relative_to(self._app_config.downloads_path)}"')
                 delete_record = DeleteRecord(file_path.parent.name, date.today(), file_path.name, file_path,
                             Outcome.archived, Result.error)
                 delete_records.append(delete_record)
                 try:
-                    # Move file to archive
-                    os.replace(file_path, Path(archive_file_path, file_path.name))
+                    # Move file to archive store
+                    store.put(file_path, file_path.relative_to(self._app_config.downloads_path))
+                    os.remove(file_path)
                     delete_record.result = Result.success
                 except (PermissionError, OSError):
                     _logger.exception(f'Cannot archive file: "{file_path}"')
@@ -83,12 +96,34 @@ class CleanOutput:
                     os.rmdir(name)
 
     # _____________________________________________________________________________
-    def process(self, fetch_paths: Set[Path]) -> List[DeleteRecord]:
+    def __delete_empty_parents(self, file_paths: List[Path]):
+        _logger.debug('__delete_empty_parents')
+        downloads_path = self._app_config.downloads_path
+        for dir_path in sorted({p.parent for p in file_paths}, key=lambda p: len(p.parts), reverse=True):
+            while dir_path != downloads_path and is_parent(downloads_path, dir_path) and dir_path.is_dir() \
+                    and not any(dir_path.iterdir()):
+                _logger.info(f'- Delete empty dir:  "{dir_path}"')
+                dir_path.rmdir()
+                dir_path = dir_path.parent
+
+    # _____________________________________________________________________________
+    def process(self, fetch_paths: Set[Path], stale_paths: Set[Path] = None) -> List[DeleteRecord]:
+        """Delete empty files and archive files not in the fetch paths.  If stale paths are given, such as the files
+        of items removed from the list, only those files are checked, else every file in the downloads folder.
+        """
         _logger.debug('process')
 
+        if stale_paths is None:
+            local_file_paths = sorted(self._app_config.downloads_path.rglob('*.*'))
+        else:
+            local_file_paths = sorted(p for p in stale_paths if p.exists())
         delete_records = []
-        delete_records.extend(self.__delete_empty_files())
-        delete_records.extend(self.__archive_extra_files(fetch_paths))
-        self.__delete_empty_directories(self._app_config.downloads_path)
+        delete_records.extend(self.__delete_empty_files(local_file_paths))
+        local_file_paths = [p for p in local_file_paths if p.exists()]
+        delete_records.extend(self.__archive_extra_files(fetch_paths, local_file_paths))
+        if stale_paths is None:
+            self.__delete_empty_directories(self._app_config.downloads_path)
+        else:
+            self.__delete_empty_parents(local_file_paths)
 
         return delete_records
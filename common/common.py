@@ -1,4 +1,6 @@
 from abc import ABC, abstractmethod
+import argparse
+import atexit
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from enum import Enum
@@ -7,10 +9,10 @@ import logging
 import os
 from pathlib import Path
 import time
-from typing import List, Any, Union
+from typing import List, Any, Tuple, Union
 import tzlocal
 
-from common.logTools import MessageFormatter, PathFileHandler
+from common.logTools import MessageFormatter, PathFileHandler, start_queue_listener
 
 local_tz = tzlocal.get_localzone()
 _logger = logging.getLogger(__name__)
@@ -80,6 +82,18 @@ class DeleteRecord:
     result: Result
 
 
+# _____________________________________________________________________________
+@dataclass
+class FetchStats:
+    __slots__ = ['files', 'bytes', 'fetchSecs', 'runSecs', 'failures', 'skips']
+    files: int
+    bytes: int
+    fetchSecs: float
+    runSecs: float
+    failures: int
+    skips: int
+
+
 # _____________________________________________________________________________
 def initialize_logger(app_path: Path, start_dt: datetime = None):
     if not start_dt:
@@ -93,6 +107,10 @@ def initialize_logger(app_path: Path, start_dt: datetime = None):
         logging.captureWarnings(True)
         logging.config.dictConfig(json.loads(p.read_text()))
 
+    # Write log records from a background thread so logging does not block the download threads
+    listener = start_queue_listener()
+    atexit.register(listener.stop)
+
     _logger.info(f'Now: {start_dt.strftime("%a  %d-%b-%y  %I:%M:%S %p")}')
     _logger.info(f'UTC: {start_utc_dt.strftime("%a  %d-%b-%y  %I:%M:%S %p")}')
     _logger.debug(f'Config file: "{logger_config_path}"')
@@ -102,3 +120,47 @@ def initialize_logger(app_path: Path, start_dt: datetime = None):
 # _____________________________________________________________________________
 def str_to_bool(s: Union[str, bool]) -> bool:
     return s if type(s) is bool else s.lower() in ('true', 't', 'yes', '1')
+
+
+# _____________________________________________________________________________
+def str_to_shard(s: str) -> Tuple[int, int]:
+    """Parse a shard "I/N" as index I, from 0, of N shards
+    """
+    try:
+        index, count = map(int, s.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'expected I/N, got "{s}"')
+    if not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f'expected 0 <= I < N, got "{s}"')
+    return index, count
+
+
+# _____________________________________________________________________________
+def parse_arguments(description: str = None) -> argparse.Namespace:
+    """Parse the command line arguments common to all applications
+    """
+    arg_parser = argparse.ArgumentParser(description=description)
+    arg_parser.add_argument('--plan', action='store_true',
+                help='list and check local files then write a plan of the downloads and archives without fetching')
+    arg_parser.add_argument('--no-probe', dest='probe', action='store_false',
+                help='with --plan, do not request remote file sizes')
+    arg_parser.add_argument('--reconcile', action='store_true',
+                help='check every record and local file, not only the items changed since the previous run')
+    arg_parser.add_argument('--search', metavar='WORDS',
+                help='search the full-text index of downloaded documents for all the words')
+    arg_parser.add_argument('--where', metavar='FIELD=VALUE', action='append',
+                help='query records where the field contains the value, can be repeated')
+    arg_parser.add_argument('--since', metavar='DATE',
+                help='query records with remote date, or with --trace-report runs started, on or after, eg 2021-06')
+    arg_parser.add_argument('--until', metavar='DATE', help='query records with remote date on or before')
+    arg_parser.add_argument('--trace-report', action='store_true',
+                help='report run, stage and host latencies from the fetch traces')
+    arg_parser.add_argument('--restore', metavar='MATCH',
+                help='restore archived files whose path contains, or content hash starts with, MATCH')
+    arg_parser.add_argument('--restore-to', metavar='DIR', type=Path,
+                help='with --restore, folder to restore files into (default restored/<app>)')
+    arg_parser.add_argument('--shard', metavar='I/N', type=str_to_shard,
+                help='fetch only shard I, from 0, of N and write a partial result for --merge')
+    arg_parser.add_argument('--merge', metavar='N', type=int,
+                help='merge the partial results of N shards then clean the output and report')
+    return arg_parser.parse_args()
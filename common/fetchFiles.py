@@ -1,62 +1,227 @@
 import concurrent.futures
-from datetime import datetime, timedelta
+from datetime import datetime
+import json
 import logging.config
+import multiprocessing
 import os
 from pathlib import Path
-import shutil
+import threading
 import time
-from typing import List
-from urllib3 import exceptions, make_headers, HTTPResponse, Retry, PoolManager, Timeout
+from typing import List, Dict, Mapping, Optional, Tuple
+from urllib3 import Retry
 
 from common.appConfig import AppConfig
-from common.common import local_tz
+from common.common import local_tz, FetchStats
+from common.fetchOrder import FetchOrder, order_records
+from common.httpClient import get_http_client, HttpDownload
+from common.httpPool import PoolStats
 from common.metricPrefix import to_decimal_units
+from common.pdfCheck import check_pdf
+from common.progress import ProgressReporter
+from common.rateLimit import RateLimiter
+from common.traceLog import TraceWriter
+from common.urlCache import NegativeCache, RedirectCache
+from common.workJournal import WorkJournal
 from whitepapers.whitepaperTypes import FetchItem, Outcome, Result
 
 _logger = logging.getLogger(__name__)
-_BUFFER_SIZE = 1024 * 1024   # buffer for downloading remote resource
-_HTTP_CODE_BAD_REQUEST = 400
+_DEFAULT_WORKERS = 8
+_PART_SUFFIX = '.part'
+_FAILED_RETRIES = Retry(0)   # URL known to fail is tried once, without retries
+_FILE_OUTCOMES = [Outcome.cached, Outcome.created, Outcome.updated]   # Outcomes of a record whose file is downloaded
 
 
 # _____________________________________________________________________________
 class FetchFiles(object):
 
     # _____________________________________________________________________________
-    def __init__(self, app_config: AppConfig):
+    def __init__(self, app_config: AppConfig, journal_path: Path = None):
         _logger.debug('__init__')
         self._app_config = app_config
+        self._journal = WorkJournal(journal_path or app_config.journal_file_path)
 
-        url_headers = make_headers(keep_alive=True, accept_encoding=True)
-        url_retries = Retry(total=3, backoff_factor=1.5, status_forcelist=[500, 502, 503, 504])
-        self.url_client = PoolManager(timeout=Timeout(total=15.0), retries=url_retries, block=True, headers=url_headers)
+        download_settings = app_config.download_settings
+        self._workers = int(download_settings.get('workers', _DEFAULT_WORKERS))
+        self._http = get_http_client(download_settings)
+        self._rate_limiter = RateLimiter.from_settings(download_settings.get('rateLimit', {}))
+        self._fetch_order = FetchOrder[download_settings.get('order', FetchOrder.listing.name)]
+        self._is_probe_sizes = download_settings.get('probeSizes', False)
+        self._is_validate = download_settings.get('validate', True)
+        self._validate_workers = int(download_settings.get('validateWorkers', None) or min(4, os.cpu_count() or 1))
+        self._negative_cache = NegativeCache(app_config.negative_cache_file_path,
+                    download_settings.get('negativeCache', {}))
+        self._redirect_cache = RedirectCache(app_config.redirect_cache_file_path,
+                    download_settings.get('redirectCache', {}))
+        self._trace = TraceWriter(app_config.trace_file_path if download_settings.get('trace', False) else None)
+        self._progress_settings = download_settings.get('progress', {})
+        self._progress = ProgressReporter(0, self._progress_settings)
+
+        self._is_debug = _logger.isEnabledFor(logging.DEBUG)
+        self._stats_lock = threading.Lock()
+        self._fetch_sizes = {}
+        self._stats = FetchStats(0, 0, 0.0, 0.0, 0, 0)
+
+    # _____________________________________________________________________________
+    @property
+    def stats(self) -> FetchStats:
+        return self._stats
+
+    # _____________________________________________________________________________
+    @property
+    def pool_stats(self) -> PoolStats:
+        return self._http.pool_stats
+
+    # _____________________________________________________________________________
+    @property
+    def fetch_sizes(self) -> Dict[str, int]:
+        """File sizes, by URL, of the files downloaded
+        """
+        return self._fetch_sizes
+
+    # _____________________________________________________________________________
+    @staticmethod
+    def is_cached(record: FetchItem) -> bool:
+        """Returns True if the local file exists and is not older than the remote date
+        """
+        if not record.filepath.exists():
+            return False
+        local_date = datetime.date(datetime.fromtimestamp(record.filepath.stat().st_ctime, local_tz))
+        return local_date >= record.dateRemote
+
+    # _____________________________________________________________________________
+    @staticmethod
+    def resolve_filepaths(records: List[FetchItem], downloads_path: Path):
+        """Convert relative record file paths to absolute paths under the downloads folder
+        """
+        for r in records:
+            if r.to_download:
+                r.filepath = Path(downloads_path, r.filepath).resolve()
+
+    # _____________________________________________________________________________
+    @staticmethod
+    def write_history(history_path: Path, records: List[FetchItem], fetch_sizes: Mapping[str, int],
+                stats: FetchStats):
+        """Persist download throughput and file sizes for estimating future runs.  File sizes are kept only
+        for URLs in the current list.
+        """
+        try:
+            history = json.loads(history_path.read_text()) if history_path.exists() else {}
+            sizes = history.get('sizes', {})
+            sizes.update(fetch_sizes)
+            urls = {r.url for r in records if r.to_download}
+            history['sizes'] = {k: v for k, v in sizes.items() if k in urls}
+            if stats.bytes > 0:
+                history['throughput'] = {'bytes': stats.bytes, 'fetchSecs': round(stats.fetchSecs, 3),
+                                         'runSecs': round(stats.runSecs, 3)}
+            history_path.write_text(json.dumps(history, indent=2))
+        except Exception as ex:
+            _logger.exception(f'Error writing history file: "{history_path}"')
+
+    # _____________________________________________________________________________
+    def __record_sizes(self, records: List[FetchItem]) -> Dict[str, Optional[int]]:
+        """Derive file sizes from the history file, else the local file, else optionally a HEAD request
+        """
+        history_path = self._app_config.history_file_path
+        history = json.loads(history_path.read_text()) if history_path.exists() else {}
+        history_sizes = history.get('sizes', {})
+
+        sizes = {}
+        for r in records:
+            if (size := history_sizes.get(r.url, None)) is None and r.filepath.exists():
+                size = r.filepath.stat().st_size
+            sizes[r.url] = size
+
+        if self._is_probe_sizes and (urls := [u for u, s in sizes.items() if s is None]):
+            _logger.info(f'Probing sizes: {len(urls)}')
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self._workers) as executor:
+                sizes.update(zip(urls, executor.map(self._http.content_length, urls)))
+
+        return sizes
+
+    # _____________________________________________________________________________
+    def __done(self, record: FetchItem):
+        self._progress.add_record()
+        self._journal.done(record)
+        self._trace.event('done', record, outcome=record.outcome.name, result=record.result.name)
 
     # _____________________________________________________________________________
     def __fetch_records(self, records: List[FetchItem]):
         _logger.debug(f'__fetch {len(records)} records')
 
         record_docs = list(filter(lambda r: r.to_download, records))
-        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
-            future_entries = {executor.submit(self.__fetch_record, rec, i) for i, rec in enumerate(record_docs, 1)}
-            for future in concurrent.futures.as_completed(future_entries):
-                record, i = future.result()
+        sizes = self.__record_sizes(record_docs) if self._fetch_order == FetchOrder.largest else None
+        record_docs = order_records(record_docs, self._fetch_order, sizes)
+        validations, validator = {}, None
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self._workers) as executor:
+                future_entries = set()
+                for i, rec in enumerate(record_docs, 1):
+                    self._trace.event('queued', rec)
+                    future_entries.add(executor.submit(self.__fetch_record, rec, i))
+                for future in concurrent.futures.as_completed(future_entries):
+                    record, i = future.result()
+
+                    # Validate PDF structure in another process so not to slow the download threads.  The process
+                    # is spawned, not forked, since forking while the download threads run can copy held locks
+                    if self._is_validate and record.outcome in [Outcome.created, Outcome.updated] \
+                                and record.filepath.suffix.lower() == '.pdf':
+                        if not validator:
+                            validator = concurrent.futures.ProcessPoolExecutor(max_workers=self._validate_workers,
+                                        mp_context=multiprocessing.get_context('spawn'))
+                        validations[validator.submit(check_pdf, str(record.filepath))] = record, i, time.time()
+                    else:
+                        self.__done(record)
+                    self.__process_validations(validations, is_wait=False)
+            self.__process_validations(validations)
+        finally:
+            if validator:
+                validator.shutdown()
+
+    # _____________________________________________________________________________
+    def __process_validations(self, validations: Dict[concurrent.futures.Future, Tuple[FetchItem, int, float]],
+                is_wait: bool = True):
+        """Flag invalid files with a warning and delete them so the next run downloads them again.  Records are
+        journaled as done once validated.  Processed validations are removed and, if not is_wait, only validations
+        already completed are processed.
+        """
+        _logger.debug(f'__process_validations {len(validations)} files')
+        futures = list(concurrent.futures.as_completed(validations)) if is_wait else \
+                    [f for f in validations if f.done()]
+        for future in futures:
+            record, i, submit_time = validations.pop(future)
+            reason = future.result()
+            self._trace.event('validate', record, secs=round(time.time() - submit_time, 3), valid=not reason)
+            if reason:
+                _logger.warning(f'> {i:4d} invalid:   "{record.filepath.name}": {reason}')
+                record.result = Result.warning
+                try:
+                    record.filepath.unlink()
+                except OSError:
+                    _logger.exception(f'> {i:4d} Cannot delete invalid file: "{record.filepath}"')
+            self.__done(record)
 
     # _____________________________________________________________________________
     def __fetch_record(self, record: FetchItem, i: int):
+        self._trace.begin(record)
         is_file_exists = record.filepath.exists()
-        _logger.debug(f'> {i:4d} exists:    {str(is_file_exists):<5s}: "{record.filename}"')
+        if self._is_debug:
+            _logger.debug(f'> {i:4d} exists:    {str(is_file_exists):<5s}: "{record.filename}"')
 
         record.result = Result.error
         record.outcome = Outcome.nil
         try:
-            if is_file_exists:
-                # Check file age
-                local_date = datetime.date(datetime.fromtimestamp(record.filepath.stat().st_ctime, local_tz))
-                remote_date = record.dateRemote
-                _logger.debug(f'> {i:4d} date:      local, remote: {local_date}, {remote_date}')
-                if local_date >= remote_date:
-                    record.result, record.outcome = Result.success, Outcome.cached
+            if is_file_exists and self.is_cached(record):
+                record.result, record.outcome = Result.success, Outcome.cached
+                if self._is_debug:
                     _logger.debug(f'> {i:4d} cached:    "{record.filepath.name}"')
-                    return record, i
+                return record, i
+            if entry := self._negative_cache.backoff(record):
+                retry_dt = datetime.fromtimestamp(entry['retryAfter'])
+                _logger.info(f'> {i:4d} skipping:  HTTP {entry["status"]} until {retry_dt:%Y-%m-%d %H:%M}: '
+                             f'"{record.filename}"')
+                with self._stats_lock:
+                    self._stats.skips += 1
+                return record, i
 
             self.__fetch_file(record, is_file_exists, i)
         except Exception as ex:
@@ -64,16 +229,49 @@ class FetchFiles(object):
 
         return record, i
 
+    # _____________________________________________________________________________
+    def __download(self, record: FetchItem, part_path: Path, retries: Optional[Retry], i: int) -> HttpDownload:
+        """Download from the cached final URL of the record URL if any, else, or if that fails, from the record URL.
+        The final URL is cached if the record URL redirects.
+        """
+        if location := self._redirect_cache.location(record.url):
+            if self._is_debug:
+                _logger.debug(f'> {i:4d} cached redirect: "{location}"')
+            download = self._http.download(location, part_path, retries=retries, tag=f'> {i:4d}',
+                                          rate_limiter=self._rate_limiter)
+            if download.status == 200:
+                if download.url != location:
+                    self._redirect_cache.put_location(record.url, download.url)
+                return download
+            if self._is_debug:
+                _logger.debug(f'> {i:4d} cached redirect failed, HTTP code: {download.status}')
+            self._redirect_cache.remove(record.url)
+
+        download = self._http.download(record.url, part_path, retries=retries, tag=f'> {i:4d}',
+                                       rate_limiter=self._rate_limiter)
+        if download.status == 200 and download.url != record.url:
+            self._redirect_cache.put_location(record.url, download.url)
+        return download
+
     # _____________________________________________________________________________
     def __fetch_file(self, record: FetchItem, is_file_exists: bool, i: int):
         downloads_path = self._app_config.downloads_path
         rel_path = record.filepath.relative_to(downloads_path)
         _logger.info(f'> {i:4d} fetching:  "{rel_path.name}" --> "{rel_path.parent}"')
-        _logger.debug(f'> {i:4d} GET:       {record.url}')
+        if self._is_debug:
+            _logger.debug(f'> {i:4d} GET:       {record.url}')
 
+        # Download to a part file so an interrupted download does not replace the file
+        part_path = Path(str(record.filepath) + _PART_SUFFIX)
+        self._journal.fetching(record)
         try:
-            rsp_status, fetch_time = self.__stream_response(record.url, record.filepath, i)
-            if rsp_status == 200:
+            # URLs that failed before are tried once, without the retries
+            retries = _FAILED_RETRIES if self._negative_cache.get(record.url) else None
+            download = self.__download(record, part_path, retries, i)
+            fetch_time = download.secs
+            if download.complete:
+                os.replace(part_path, record.filepath)
+                self._negative_cache.remove(record.url)
                 record.result = Result.success
                 record.outcome = Outcome.updated if is_file_exists else Outcome.created
 
@@ -84,92 +282,98 @@ class FetchFiles(object):
 
                 # Derive file size
                 file_size = record.filepath.stat().st_size
-                _logger.debug(f'> {i:4d} fetch time, size: {fetch_time:.2f}s, {to_decimal_units(file_size)}')
+                if self._is_debug:
+                    _logger.debug(f'> {i:4d} fetch time, size: {fetch_time:.2f}s, {to_decimal_units(file_size)}')
+                with self._stats_lock:
+                    self._fetch_sizes[record.url] = file_size
+                    self._stats.files += 1
+                    self._stats.bytes += file_size
+                    self._stats.fetchSecs += fetch_time
+            elif download.status == 200:
+                # Keep the file, as the part file is incomplete
+                _logger.error(f'> {i:4d} incomplete download: {download.bytes} bytes')
             else:
-                _logger.error(f'> {i:4d} HTTP code: {rsp_status}')
+                _logger.error(f'> {i:4d} HTTP code: {download.status}')
+                if self._negative_cache.is_negative(download.status):
+                    entry = self._negative_cache.add_failure(record, download.status)
+                    if self._is_debug:
+                        _logger.debug(f'> {i:4d} failures:  {entry["failures"]}')
+                    with self._stats_lock:
+                        self._stats.failures += 1
                 if record.filepath.exists():
                     record.filepath.unlink()
-                    _logger.debug(f'> {i:4d} deleting:  "{rel_path}"')
+                    if self._is_debug:
+                        _logger.debug(f'> {i:4d} deleting:  "{rel_path}"')
                     record.outcome = Outcome.deleted
         except Exception as ex:
             _logger.exception(f'> {i:4d} generic exception')
-
-    # _____________________________________________________________________________
-    def __get_response(self, url: str, filepath: Path, i: int):
-        # Must call release_conn() after file copied but opening/writing exception is possible
-        rsp = None
-        fetch_time = timedelta()
-        try:
-            redirect_count = 3
-            start_time = time.time()
-            rsp = self.url_client.request('GET', url, preload_content=False)
-            _logger.debug(f'> {i:4d} resp code: {rsp.status}')
-            while rsp.status in HTTPResponse.REDIRECT_STATUSES and redirect_count > 0:
-                if location := rsp.headers.get('location', None):
-                    _logger.debug(f'> {i:4d} redirct:   {url} --> {location}')
-                    url = location
-                    rsp.release_conn()
-                    rsp = self.url_client.request('GET', location, preload_content=False)
-                else:
-                    raise RuntimeError('Response header "location" not found')
-            if rsp.status == 200:
-                _logger.debug(f'> {i:4d} write:     "{filepath.name}"')
-                with filepath.open('wb', buffering=_BUFFER_SIZE) as rfp:
-                    shutil.copyfileobj(rsp, rfp, length=_BUFFER_SIZE)
-            fetch_time = time.time() - start_time
-        except exceptions.HTTPError as ex:
-            _logger.exception(f'> {i:4d} HTTP error')
-        except Exception as ex:
-            _logger.exception('Unexpected')
-            raise ex
-        finally:
-            if rsp:
-                rsp.release_conn()
-
-        return rsp.status if rsp else _HTTP_CODE_BAD_REQUEST, fetch_time
-
-    # _____________________________________________________________________________
-    def __stream_response(self, url: str, filepath: Path, i: int):
-        # Must call release_conn() after file copied but opening/writing exception is possible
-        rsp = None
-        start_time, fetch_time = time.time(), timedelta()
-        try:
-            rsp = self.url_client.request('GET', url, preload_content=False)
-            _logger.debug(f'> {i:4d} resp code: {rsp.status}')
-            while rsp.status in HTTPResponse.REDIRECT_STATUSES:
-                if location := rsp.headers.get('location', None):
-                    _logger.debug(f'> {i:4d} redirct:   {url} --> "{location}"')
-                    url = location
-                    rsp.release_conn()
-                    rsp = self.url_client.request('GET', url, preload_content=False)
-                    _logger.debug(f'> {i:4d} resp code: {rsp.status}')
-                else:
-                    raise RuntimeError('Response header "location" not found')
-            if rsp.status == 200:
-                _logger.debug(f'> {i:4d} write:     "{filepath.name}"')
-                with filepath.open('wb', buffering=_BUFFER_SIZE) as rfp:
-                    shutil.copyfileobj(rsp, rfp, length=_BUFFER_SIZE)
-            fetch_time = time.time() - start_time
-        except exceptions.HTTPError as ex:
-            _logger.exception(f'> {i:4d} HTTP error')
         finally:
-            if rsp:
-                rsp.release_conn()
-
-        return rsp.status if rsp else _HTTP_CODE_BAD_REQUEST, fetch_time
+            part_path.unlink(missing_ok=True)
 
     # _____________________________________________________________________________
-    def process(self, records):
+    def process(self, records, is_partial: bool = False):
+        """Fetch the records.  If is_partial, the records are a part of the list, such as a shard, so the history
+        file and URL caches are not written: the caller saves the URL caches with save_url_caches() to its own files.
+        """
         _logger.debug('process')
 
         # Prepare record data for fetching
-        for r in records:
-            if r.to_download:
-                r.filepath = Path(self._app_config.downloads_path, r.filepath).resolve()
+        self.resolve_filepaths(records, self._app_config.downloads_path)
 
         # Create downloads directories
         dirs = {r.filepath.parent for r in records if r.to_download}
         for dir in dirs:
             dir.mkdir(parents=True, exist_ok=True)
 
-        self.__fetch_records(records)
+        # Resume from the journal of an interrupted run, removing part files it left.  Records already cached,
+        # such as records unchanged since the previous run, are not fetched.  A record journaled as downloaded is
+        # fetched again if its file no longer exists, such as deleted between the runs.
+        done = self._journal.open()
+        pending_records = []
+        for r in filter(lambda r: r.to_download, records):
+            if r.outcome == Outcome.cached and r.result == Result.success:
+                continue
+            Path(str(r.filepath) + _PART_SUFFIX).unlink(missing_ok=True)
+            state = done.get(r.filename, None)
+            if state and state[0] in _FILE_OUTCOMES and state[1] == Result.success and not r.filepath.exists():
+                state = None
+            if state:
+                r.outcome, r.result = state
+            else:
+                pending_records.append(r)
+        if done:
+            _logger.info(f'Resuming interrupted run: {len(done)} records done, {len(pending_records)} pending')
+
+        # Trace the record stages, and HTTP requests through the client hook
+        self._trace.open()
+        self._trace.event('run', count=len(pending_records), resumed=len(done))
+        if self._trace.is_enabled:
+            self._http.add_hook(self._trace.hook)
+        self._progress = ProgressReporter(len(pending_records), self._progress_settings)
+        self._http.add_hook(self._progress.hook)
+        self._progress.start()
+        start_time = time.time()
+        try:
+            self.__fetch_records(pending_records)
+        finally:
+            self._progress.stop()
+            self._http.remove_hook(self._progress.hook)
+            self._journal.close()
+            self._stats.runSecs = time.time() - start_time
+            _logger.info(f'Connections: {self.pool_stats}')
+            self._http.remove_hook(self._trace.hook)
+            self._trace.event('end', **{s: getattr(self._stats, s) for s in FetchStats.__slots__})
+            self._trace.close()
+        if not is_partial:
+            self.write_history(self._app_config.history_file_path, records, self._fetch_sizes, self._stats)
+            self.save_url_caches(records)
+
+    # _____________________________________________________________________________
+    def save_url_caches(self, records, negative_cache_path: Path = None, redirect_cache_path: Path = None):
+        """Write the negative and redirect caches, keeping only entries for the record URLs, to the paths if given,
+        else to the application cache files
+        """
+        urls = {r.url for r in records if r.to_download}
+        self._negative_cache.save(urls, negative_cache_path)
+        self._redirect_cache.save(urls, redirect_cache_path)
+        _logger.info(f'Failing URLs: {len(self._negative_cache)}')
@@ -1,20 +1,31 @@
 from abc import ABC, abstractmethod
-
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import date, datetime, timezone
+import hashlib
 import logging
 import json
 from pathlib import Path
+import queue
+import threading
 import time
-from typing import List, Any, Mapping
+from typing import List, Any, Dict, Mapping, Iterator, Optional, Tuple
 from urllib import parse
-from urllib3 import exceptions, make_headers, Retry, PoolManager, Timeout
+from urllib3 import exceptions, Retry
 
 from common.appConfig import AppConfig
 from common.common import local_tz
+from common.httpClient import get_http_client
+from common.listSnapshot import fingerprint_item
 from common.pathTools import sanitize_filename
+from common.recordStore import RecordStore
+from common.urlCache import PageSizeCache
 
 _logger = logging.getLogger(__name__)
+_LIST_HEADERS = {'Accept': 'text/*', 'Accept-Charset': 'utf-8'}
+_LIST_RETRIES = Retry(total=4, backoff_factor=3, status_forcelist=[500, 502, 503, 504])
+_DEFAULT_PAGE_SIZE = 15
+_MAX_PAGE_SIZE = 1000
 
 
 # _____________________________________________________________________________
@@ -24,17 +35,25 @@ class FetchList(ABC):
     def __init__(self, app_config: AppConfig):
         _logger.debug('__init__')
         self._app_config = app_config
-
-        url_headers = make_headers(keep_alive=True, accept_encoding=True)
-        url_headers.update({'Accept': 'text/*', 'Accept-Charset': 'utf-8'})
-        url_retries = Retry(total=4, backoff_factor=3, status_forcelist=[500, 502, 503, 504])
-        self.url_client = PoolManager(timeout=Timeout(total=15.0), retries=url_retries, block=True, headers=url_headers)
+        self._http = get_http_client(app_config.download_settings)
+        self._fingerprints = {}
+        page_size_settings = app_config.list_settings.get('pageSize', {})
+        self._is_adaptive_size = page_size_settings.get('adaptive', True)
+        self._max_page_size = int(page_size_settings.get('maxSize', _MAX_PAGE_SIZE))
+        self._page_sizes = PageSizeCache(app_config.page_size_cache_file_path, page_size_settings)
 
     # _____________________________________________________________________________
     @abstractmethod
     def build_record(self, item) -> dataclass:
         raise NotImplementedError('build_record')
 
+    # _____________________________________________________________________________
+    @property
+    def fingerprints(self) -> Mapping[str, str]:
+        """Fingerprint, by name, of the list item of each record built
+        """
+        return self._fingerprints
+
     # _____________________________________________________________________________
     @staticmethod
     def build_filename(fname: str, fdate: date, url: str) -> str:
@@ -47,26 +66,54 @@ class FetchList(ABC):
         return (fname + url_path[loc:]) if loc >= 0 else fname
 
     # _____________________________________________________________________________
-    def __process_list(self, list_pages) -> List[Any]:
+    def __process_list(self, list_pages: Iterator[Tuple[int, Mapping[str, Any]]]) -> List[Any]:
+        """Build records from the list pages of the sources.  Pages are consumed one at a time so each page is
+        released once its records are built.  An item listed by more than one source is kept once, from the first
+        source listing it, and when the sources have more than one locale the files are laid out by locale.
+        """
         _logger.debug('__process_list')
-        records = []
-        for page in list_pages:
+        records = RecordStore() if self._app_config.list_settings.get('columnar', False) else []
+        locales = [s.get('item.locale', None) for s in self._app_config.sources]
+        is_by_locale = len(set(locales)) > 1
+        names = {}
+        duplicates = 0
+        for source_num, page in list_pages:
             for grp in page['items']:
                 item = grp['item']
                 record = self.build_record(item)
-                records.append(record)
+                if is_by_locale and record.filepath:
+                    record.filepath = Path(locales[source_num], record.filepath)
+                if (first := names.get(record.name, None)) is None:
+                    names[record.name] = source_num, len(records)
+                    self._fingerprints[record.name] = fingerprint_item(item)
+                    records.append(record)
+                    continue
+                duplicates += 1
+                if source_num < first[0]:
+                    names[record.name] = source_num, first[1]
+                    self._fingerprints[record.name] = fingerprint_item(item)
+                    records[first[1]] = record
+        if duplicates:
+            _logger.info(f'Duplicate items: {duplicates}')
         _logger.info(f'Number items: {len(records)}')
         return records
 
     # _____________________________________________________________________________
-    def __fetch_list_page(self, page_num: int, fields: Mapping[str, str]):
-        _logger.info(f'  fetch list: page {page_num:3d}')
+    def __page_filename(self, source_num: int, page_num: int) -> str:
+        if len(self._app_config.sources) > 1:
+            return f'{self._app_config.name}.{source_num:02d}.{page_num:03d}.json'
+        return f'{self._app_config.name}.{page_num:03d}.json'
+
+    # _____________________________________________________________________________
+    def __fetch_list_page(self, source_num: int, page_num: int, fields: Mapping[str, str]):
+        _logger.info(f'  fetch list: source {source_num:2d} page {page_num:3d}')
         list_page, cache_pf = None, None
         hits_total, count = 0, 0
 
         try:
-            rsp = self.url_client.request('GET', self._app_config.source_url, fields=fields)
-            _logger.debug(f'> {page_num:4d} response status  {rsp.status}')
+            rsp = self._http.request('GET', self._app_config.source_url, fields=fields, headers=_LIST_HEADERS,
+                        retries=_LIST_RETRIES)
+            _logger.debug(f'> {source_num:2d} {page_num:4d} response status  {rsp.status}')
             if rsp.status == 200:
                 # extract data
                 list_page = json.loads(rsp.data.decode('utf-8'))
@@ -76,45 +123,157 @@ class FetchList(ABC):
 
                 # Write list page to cache
                 if count > 1:
-                    fname = f'{self._app_config.name}.{page_num:03d}.json'
+                    fname = self.__page_filename(source_num, page_num)
                     cache_pf = Path(self._app_config.cache_path, fname).resolve()
-                    _logger.debug(f'> {page_num:4d} write {fname}')
+                    _logger.debug(f'> {source_num:2d} {page_num:4d} write {fname}')
                     cache_pf.write_text(json.dumps(list_page, indent=2))
         except exceptions.MaxRetryError as ex:
-            _logger.exception(f'> {page_num:4d} Maximum reties exceeded')
+            _logger.exception(f'> {source_num:2d} {page_num:4d} Maximum reties exceeded')
             raise
         except exceptions.HTTPError as ex:
-            _logger.exception(f'> {page_num:4d} HTTPError')
+            _logger.exception(f'> {source_num:2d} {page_num:4d} HTTPError')
             raise
 
         return list_page, count, hits_total, cache_pf
 
     # _____________________________________________________________________________
-    def __fetch_list(self):
-        _logger.debug('__fetch_list')
-        _logger.info(f'URL: {self._app_config.source_url}')
+    @staticmethod
+    def __put_page(pages: queue.Queue, page: Optional[Tuple[int, Mapping[str, Any]]], stop_event: threading.Event):
+        """Put the page in the queue, waiting while the queue is full unless the listing is stopped
+        """
+        while True:
+            try:
+                pages.put(page, timeout=0.5)
+                return
+            except queue.Full:
+                if stop_event.is_set():
+                    return
+
+    # _____________________________________________________________________________
+    def __page_size_key(self, fields: Mapping[str, str]) -> str:
+        return f'{self._app_config.source_url}?item.directoryId={fields.get("item.directoryId", "")}'
+
+    # _____________________________________________________________________________
+    def __source_fields(self, source_num: int) -> Dict[str, str]:
+        """Returns the list parameters of the source with the page size remembered for its directory, if any
+        """
+        fields = dict(self._app_config.sources[source_num])
+        if self._is_adaptive_size and (size := self._page_sizes.size(self.__page_size_key(fields))):
+            fields['size'] = str(size)
+        return fields
 
-        list_pages, cache_files = [], []
-        hits_count, page_num = 0, 0
-        fields = self._app_config.source_parameters.copy()
+    # _____________________________________________________________________________
+    def __probe_page_size(self, source_num: int, fields: Mapping[str, str]) -> Tuple[int, Optional[tuple]]:
+        """Returns the largest page size honoured by the source, and the first page fetched with that size if the
+        last probe.  The size is doubled from the configured size, up to the maximum size, until the list fits in
+        the first page or the page is truncated, that is has fewer items than the size and the total hits.  A
+        truncated count is then probed as the source limit.
+        """
+        size, probe_size, max_size = 0, int(fields.get('size', _DEFAULT_PAGE_SIZE)), self._max_page_size
         while True:
-            list_page, count, hits_total, cache_pf = self.__fetch_list_page(page_num, fields)
-            _logger.debug(f'> {page_num:4d} hits total, hits count, count: {hits_total}, {hits_count}, {count}')
-            if count < 1:
-                break
-            list_pages.append(list_page)
-            hits_count += count
-            cache_files.append(cache_pf)
-            if hits_count >= hits_total:
+            result = self.__fetch_list_page(source_num, 0, {**fields, 'size': str(probe_size)})
+            count, hits_total = result[1], result[2]
+            if count == probe_size or count >= hits_total:
+                size = probe_size
+                if count >= hits_total or probe_size >= max_size:
+                    break
+                probe_size = min(2 * probe_size, max_size)
+            elif count > size:
+                _logger.debug(f'> {source_num:2d} page size {probe_size} truncated to {count}')
+                max_size = probe_size = count
+            else:
                 break
-            page_num += 1
-            fields['page'] = page_num
+        if not size:
+            return int(fields.get('size', _DEFAULT_PAGE_SIZE)), None
+        _logger.info(f'  list page size: source {source_num:2d} size {size}')
+        self._page_sizes.put_size(self.__page_size_key(fields), size)
+        return size, result if probe_size == size else None
+
+    # _____________________________________________________________________________
+    def __fetch_source(self, source_num: int, pages: queue.Queue, stop_event: threading.Event):
+        """Fetch the list pages of a source into the queue, followed by None.  Returns the hits count and cache
+        files.  A page truncated by the source, such as after the source lowers its page size limit, restarts the
+        listing with the configured page size, skipping the items already put in the queue.
+        """
+        start_time = time.time()
+        cache_files = []
+        hits_count, page_num, put_count = 0, 0, 0
+        fields = dict(self._app_config.sources[source_num])
+        configured_size = fields.get('size', None)
+        result = None
+        try:
+            if self._is_adaptive_size:
+                if not (size := self._page_sizes.size(self.__page_size_key(fields))):
+                    size, result = self.__probe_page_size(source_num, fields)
+                fields['size'] = str(size)
+            while not stop_event.is_set():
+                result = result or self.__fetch_list_page(source_num, page_num, fields)
+                list_page, count, hits_total, cache_pf = result
+                result = None
+                _logger.debug(f'> {source_num:2d} {page_num:4d} hits total, hits count, count: '
+                              f'{hits_total}, {hits_count}, {count}')
+                if count < 1:
+                    break
+                if count < int(fields.get('size', _DEFAULT_PAGE_SIZE)) and hits_count + count < hits_total and \
+                        fields['size'] != configured_size:
+                    _logger.warning(f'> {source_num:2d} {page_num:4d} page truncated to {count} of {fields["size"]}, '
+                                    f'listing again with the configured page size')
+                    self._page_sizes.remove(self.__page_size_key(fields))
+                    fields = dict(self._app_config.sources[source_num])
+                    cache_files, hits_count, page_num = [], 0, 0
+                    continue
+                hits_count += count
+                cache_files.append(cache_pf)
+                if hits_count > put_count:
+                    if (skip_count := count - (hits_count - put_count)) > 0:
+                        list_page = dict(list_page, items=list_page['items'][skip_count:])
+                    self.__put_page(pages, (source_num, list_page), stop_event)
+                    put_count = hits_count
+                del list_page
+                if hits_count >= hits_total:
+                    break
+                page_num += 1
+                fields['page'] = page_num
+        finally:
+            self.__put_page(pages, None, stop_event)
+        _logger.info(f'  list source {source_num:2d}: {hits_count} items, {len(cache_files)} pages of '
+                     f'{fields.get("size", "")} in {time.time() - start_time:.1f}s')
+        return hits_count, cache_files
+
+    # _____________________________________________________________________________
+    def __fetch_list(self) -> Iterator[Tuple[int, Mapping[str, Any]]]:
+        """Generator of list pages, with their source number, fetched from the sources.  The sources are listed
+        concurrently, each by its own thread, so the pages of the sources are interleaved.  The summary file is
+        written, and superfluous cache files removed, only after the last page of every source is consumed.
+        """
+        _logger.debug('__fetch_list')
+        _logger.info(f'URL: {self._app_config.source_url}')
+
+        num_sources = len(self._app_config.sources)
+        pages = queue.Queue(maxsize=2 * num_sources)
+        stop_event = threading.Event()
+        with ThreadPoolExecutor(max_workers=num_sources, thread_name_prefix='list') as executor:
+            futures = [executor.submit(self.__fetch_source, i, pages, stop_event) for i in range(num_sources)]
+            try:
+                running = num_sources
+                while running:
+                    if (page := pages.get()) is None:
+                        running -= 1
+                        continue
+                    yield page
+                    del page
+            finally:
+                stop_event.set()
+        results = [f.result() for f in futures]
+        self._page_sizes.save()
+        hits_count = sum(r[0] for r in results)
+        cache_files = [pf for r in results for pf in r[1]]
 
         # Write summary file
         utc_dt = datetime.now(timezone.utc)
         now_dt = utc_dt.astimezone(tz=local_tz)
         summary = f'{{"written":{{"local":"{now_dt:%Y-%m-%d %H:%H:%S}","utc":"{utc_dt:%Y-%m-%d %H:%H:%S}"}}' \
-                f',"count":"{hits_count}","pages":"{len(cache_files)}"}}'
+                f',"count":"{hits_count}","pages":"{len(cache_files)}","sources":"{num_sources}"}}'
         summary_filepath = self._app_config.summary_file_path
         summary_filepath.write_text(json.dumps(json.loads(summary), indent=2))
         cache_files.append(summary_filepath)
@@ -125,7 +284,55 @@ class FetchList(ABC):
         if deleted_files:
             _logger.debug(f'> Deleted {len(deleted_files)} unwanted cached files')
 
-        return list_pages
+    # _____________________________________________________________________________
+    def __read_cached_list(self) -> Iterator[Tuple[int, Mapping[str, Any]]]:
+        """Generator of list pages, with their source number, read from the cache files in source and page order
+        """
+        _logger.debug('__read_cached_list')
+        summary_filepath = self._app_config.summary_file_path
+        for p in sorted(self._app_config.cache_path.glob('*.*')):
+            if not p.samefile(summary_filepath):
+                parts = p.name.split('.')
+                source_num = int(parts[-3]) if len(parts) > 3 and parts[-3].isdigit() else 0
+                yield source_num, json.loads(p.read_text())
+
+    # _____________________________________________________________________________
+    @staticmethod
+    def fingerprint(list_page: Mapping[str, Any]) -> str:
+        """Returns a hash of the list page total hits and items
+        """
+        sha = hashlib.sha256(str(list_page['metadata']['totalHits']).encode('utf-8'))
+        sha.update(json.dumps(list_page['items'], sort_keys=True).encode('utf-8'))
+        return sha.hexdigest()
+
+    # _____________________________________________________________________________
+    def probe_list(self) -> bool:
+        """Returns True if the first list page of any source differs from its cached first page.  As the list is
+        sorted by date, newest first, added or updated items change the first page and removed items change the
+        total hits.  The probe is a single request per source, with the page size of the listing, and the cache is
+        not changed.
+        """
+        _logger.debug('probe_list')
+        for source_num in range(len(self._app_config.sources)):
+            cache_pf = Path(self._app_config.cache_path, self.__page_filename(source_num, 0))
+            if not cache_pf.exists():
+                return True
+
+            fields = self.__source_fields(source_num)
+            rsp = self._http.request('GET', self._app_config.source_url, fields=fields, headers=_LIST_HEADERS,
+                        retries=_LIST_RETRIES)
+            if rsp.status != 200:
+                raise exceptions.HTTPError(f'List probe response status {rsp.status}')
+            list_page = json.loads(rsp.data.decode('utf-8'))
+            if self.fingerprint(list_page) != self.fingerprint(json.loads(cache_pf.read_text())):
+                return True
+        return False
+
+    # _____________________________________________________________________________
+    def expire_cache(self):
+        """Expire the cached list so the next build fetches the list from the source
+        """
+        self._app_config.summary_file_path.unlink(missing_ok=True)
 
     # _____________________________________________________________________________
     def build_list(self):
@@ -141,10 +348,8 @@ class FetchList(ABC):
 
         # Build list
         _logger.info(f'Use cached list: {is_use_cache}')
-        list_pages = []
         if is_use_cache:
-            [list_pages.append(json.loads(p.read_text())) for p in cache_path.glob('*.*') if
-                not p.samefile(summary_filepath)]
+            list_pages = self.__read_cached_list()
         else:
             cache_path.mkdir(parents=True, exist_ok=True)
             list_pages = self.__fetch_list()
@@ -0,0 +1,58 @@
+"""Ordering of records submitted for download.
+
+With a fixed number of download threads, the run finishes when the last download finishes.  A large file started
+late in the run can keep a single thread busy after the others are idle.  Starting the largest files first
+(longest-processing-time first) keeps the threads evenly loaded until the queue drains.
+"""
+from collections import OrderedDict
+from enum import Enum
+from itertools import chain, zip_longest
+import logging
+from operator import attrgetter
+from typing import List, Mapping, Optional
+
+from common.common import FetchItem
+
+_logger = logging.getLogger(__name__)
+
+
+# _____________________________________________________________________________
+class FetchOrder(Enum):
+    listing = 'Listing',
+    largest = 'Largest',
+    newest = 'Newest',
+    fair = 'Fair'
+
+
+# _____________________________________________________________________________
+def order_largest(records: List[FetchItem], sizes: Mapping[str, Optional[int]]) -> List[FetchItem]:
+    """Largest known size first.  Records of unknown size are given the mean of the known sizes.
+    """
+    known = [s for s in sizes.values() if s is not None]
+    default_size = sum(known) // len(known) if known else 0
+    return sorted(records, key=lambda r: s if (s := sizes.get(r.url, None)) is not None else default_size,
+                reverse=True)
+
+
+# _____________________________________________________________________________
+def order_fair(records: List[FetchItem]) -> List[FetchItem]:
+    """Round-robin across content types, keeping the listing order within each content type
+    """
+    groups = OrderedDict()
+    for r in records:
+        groups.setdefault(getattr(r, 'contentType', None) or '', []).append(r)
+    return [r for r in chain.from_iterable(zip_longest(*groups.values())) if r is not None]
+
+
+# _____________________________________________________________________________
+def order_records(records: List[FetchItem], order: FetchOrder,
+            sizes: Mapping[str, Optional[int]] = None) -> List[FetchItem]:
+    _logger.debug(f'order_records {order.name}')
+
+    if order == FetchOrder.largest:
+        return order_largest(records, sizes or {})
+    if order == FetchOrder.newest:
+        return sorted(records, key=attrgetter('dateRemote'), reverse=True)
+    if order == FetchOrder.fair:
+        return order_fair(records)
+    return list(records)
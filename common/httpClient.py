@@ -0,0 +1,252 @@
+"""HTTP client shared by the list and file fetchers.
+
+One pooled client is created per process so that listing and downloading reuse the same warm (TLS) connections.
+All requests go through request() or download() and these call the hooks, so metrics, tracing and rate limiting
+have a single place in the HTTP path.
+
+Notes:
+- urllib3 replaces, not merges, the pool manager default headers with the request headers.  Thus request headers
+are merged with the default headers here.
+- Downloads follow redirects manually, with a cap, so each hop can be logged and reported to the hooks.
+- The client is shared by the process, so a rate limiter is passed with each download and not set on the client.
+- Download bodies without a content encoding are read by the underlying http.client response straight into a
+buffer reused by each thread, and written unbuffered to the file descriptor, so no bytes object is allocated per
+chunk.  urllib3 readinto() reads into a new bytes object then copies it.  Encoded bodies are read through urllib3 to
+be decoded.
+"""
+from dataclasses import dataclass
+import http.client
+import logging
+import os
+from pathlib import Path
+import threading
+import time
+from typing import Callable, Any, Mapping, Optional, List
+from urllib import parse
+from urllib3 import exceptions, make_headers, HTTPResponse, Retry, Timeout
+
+from common.httpPool import PoolStats, StatsPoolManager
+from common.rateLimit import RateLimiter
+
+_logger = logging.getLogger(__name__)
+_BUFFER_SIZE = 1024 * 1024   # buffer for downloading remote resource
+_DEFAULT_WORKERS = 8
+_MAX_REDIRECTS = 3
+_HTTP_CODE_BAD_REQUEST = 400
+_OPEN_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0)
+_UNLIMITED = RateLimiter()
+
+_client = None
+_client_pool_settings = None
+_ignored_pool_settings = set()
+_client_lock = threading.Lock()
+
+
+# _____________________________________________________________________________
+@dataclass
+class HttpDownload:
+    """Result of a download.  "complete" is True only if the status is 200 and the whole body was written.
+    """
+    __slots__ = ['status', 'url', 'bytes', 'secs', 'complete']
+    status: int
+    url: str
+    bytes: int
+    secs: float
+    complete: bool
+
+
+# _____________________________________________________________________________
+class HttpClient(object):
+
+    # _____________________________________________________________________________
+    def __init__(self, num_pools: int = 10, maxsize: int = _DEFAULT_WORKERS):
+        _logger.debug(f'__init__ num pools, maxsize: {num_pools}, {maxsize}')
+
+        self._headers = make_headers(keep_alive=True, accept_encoding=True)
+        url_retries = Retry(total=3, backoff_factor=1.5, status_forcelist=[500, 502, 503, 504])
+        self._url_client = StatsPoolManager(num_pools=num_pools, headers=self._headers, maxsize=maxsize,
+                    timeout=Timeout(total=15.0), retries=url_retries, block=True)
+        self._hooks: List[Callable[[str, Mapping[str, Any]], None]] = []
+        self._local = threading.local()
+
+    # _____________________________________________________________________________
+    @property
+    def pool_stats(self) -> PoolStats:
+        return self._url_client.pool_stats
+
+    # _____________________________________________________________________________
+    def add_hook(self, hook: Callable[[str, Mapping[str, Any]], None]):
+        """Add a callable hook(event, info) called for events "request", "redirect", "chunk" and "download".  The
+        "chunk" event is called with the bytes of each chunk of a download body as it is written.
+        """
+        self._hooks.append(hook)
+
+    # _____________________________________________________________________________
+    def remove_hook(self, hook: Callable[[str, Mapping[str, Any]], None]):
+        if hook in self._hooks:
+            self._hooks.remove(hook)
+
+    # _____________________________________________________________________________
+    def _emit(self, event: str, **info):
+        for hook in self._hooks:
+            try:
+                hook(event, info)
+            except Exception as ex:
+                _logger.exception(f'Hook error: {event}')
+
+    # _____________________________________________________________________________
+    def request(self, method: str, url: str, fields: Mapping[str, Any] = None, headers: Mapping[str, str] = None,
+                retries: Retry = None, **kwargs) -> HTTPResponse:
+        """Make a request merging the headers with the default headers
+        """
+        start_time = time.time()
+        rsp = self._url_client.request(method, url, fields=fields, headers={**self._headers, **(headers or {})},
+                    retries=retries, **kwargs)
+        self._emit('request', method=method, url=url, status=rsp.status, secs=time.time() - start_time,
+                    retries=len(rsp.retries.history) if rsp.retries else 0)
+        return rsp
+
+    # _____________________________________________________________________________
+    def content_length(self, url: str) -> Optional[int]:
+        """Returns the content length from a HEAD request, or None if not known
+        """
+        try:
+            rsp = self.request('HEAD', url)
+            if rsp.status == 200 and (length := rsp.headers.get('content-length', None)):
+                return int(length)
+        except (exceptions.HTTPError, ValueError):
+            _logger.debug(f'HEAD failed: {url}')
+        return None
+
+    # _____________________________________________________________________________
+    def __buffer(self) -> memoryview:
+        if (buffer := getattr(self._local, 'buffer', None)) is None:
+            buffer = self._local.buffer = memoryview(bytearray(_BUFFER_SIZE))
+        return buffer
+
+    # _____________________________________________________________________________
+    @staticmethod
+    def __preallocate(fd: int, length: int):
+        """Reserve the file space so the file is written without growing it, where the platform supports it
+        """
+        if length > 0 and hasattr(os, 'posix_fallocate'):
+            try:
+                os.posix_fallocate(fd, 0, length)
+            except OSError:
+                pass
+
+    # _____________________________________________________________________________
+    def __copy_response(self, rsp: HTTPResponse, fd: int, is_encoded: bool, rate_limiter: RateLimiter) -> int:
+        """Copy the response body to the file descriptor, pacing reads to the rate limit
+        """
+        buffer = self.__buffer()
+        raw = None if is_encoded else getattr(rsp, '_fp', None)
+        size = 0
+        while True:
+            chunk_size = rate_limiter.chunk_size(_BUFFER_SIZE)
+            if raw:
+                # Raw read errors are not translated by urllib3, so raise them as urllib3 errors for the caller
+                try:
+                    view = buffer[:raw.readinto(buffer[:chunk_size])]
+                except (OSError, http.client.HTTPException) as ex:
+                    raise exceptions.ProtocolError(f'Response read failed after {size} bytes: {ex!r}') from ex
+            else:
+                view = memoryview(rsp.read(chunk_size))
+            if not (n := len(view)):
+                break
+            rate_limiter.acquire(n)
+            while view:
+                view = view[os.write(fd, view):]
+            size += n
+            self._emit('chunk', bytes=n)
+        return size
+
+    # _____________________________________________________________________________
+    def __write_response(self, rsp: HTTPResponse, filepath: Path, rate_limiter: RateLimiter) -> int:
+        """Write the response body to file, preallocated from the content length if known and not encoded
+        """
+        is_encoded = rsp.headers.get('content-encoding', 'identity').lower() != 'identity'
+        length = int(value) if not is_encoded and (value := rsp.headers.get('content-length', None)) else None
+        fd = os.open(filepath, _OPEN_FLAGS, 0o666)
+        try:
+            if length:
+                self.__preallocate(fd, length)
+            size = self.__copy_response(rsp, fd, is_encoded, rate_limiter)
+            if length is not None and size != length:
+                os.ftruncate(fd, size)
+                raise exceptions.ProtocolError(f'Response ended after {size} of {length} bytes')
+        finally:
+            os.close(fd)
+        return size
+
+    # _____________________________________________________________________________
+    def download(self, url: str, filepath: Path, retries: Retry = None, max_redirects: int = _MAX_REDIRECTS,
+                tag: str = '>', rate_limiter: RateLimiter = None) -> HttpDownload:
+        """Stream the resource to file, following at most max_redirects redirects.  The file is written only if
+        the final response status is 200, and is incomplete if the body could not be read in full.  The body is read
+        at the pace of rate_limiter, if any.
+        """
+        # Must call release_conn() after file copied but opening/writing exception is possible
+        rsp = None
+        is_debug = _logger.isEnabledFor(logging.DEBUG)
+        start_time, size, is_complete = time.time(), 0, False
+        try:
+            rsp = self.request('GET', url, retries=retries, redirect=False, preload_content=False)
+            if is_debug:
+                _logger.debug(f'{tag} resp code: {rsp.status}')
+            redirect_count = 0
+            while rsp.status in HTTPResponse.REDIRECT_STATUSES:
+                if redirect_count >= max_redirects:
+                    raise exceptions.MaxRetryError(None, url, f'Redirects exceeded {max_redirects}')
+                if not (location := rsp.headers.get('location', None)):
+                    raise RuntimeError('Response header "location" not found')
+                location = parse.urljoin(url, location)
+                if is_debug:
+                    _logger.debug(f'{tag} redirct:   {url} --> "{location}"')
+                self._emit('redirect', url=url, location=location, status=rsp.status)
+                url = location
+                redirect_count += 1
+                rsp.drain_conn()
+                rsp.release_conn()
+                rsp = self.request('GET', url, retries=retries, redirect=False, preload_content=False)
+                if is_debug:
+                    _logger.debug(f'{tag} resp code: {rsp.status}')
+            if rsp.status == 200:
+                if is_debug:
+                    _logger.debug(f'{tag} write:     "{filepath.name}"')
+                size = self.__write_response(rsp, filepath, rate_limiter or _UNLIMITED)
+                is_complete = True
+        except exceptions.HTTPError as ex:
+            _logger.exception(f'{tag} HTTP error')
+        finally:
+            if rsp:
+                rsp.release_conn()
+
+        download = HttpDownload(rsp.status if rsp else _HTTP_CODE_BAD_REQUEST, url, size, time.time() - start_time,
+                    is_complete)
+        self._emit('download', url=url, status=download.status, bytes=download.bytes, secs=download.secs,
+                    complete=download.complete)
+        return download
+
+
+# _____________________________________________________________________________
+def get_http_client(download_settings: Mapping[str, Any] = None) -> HttpClient:
+    """Returns the process HTTP client, creating it on first call.  Connection pools hold "download.pool.maxSize"
+    connections per host, by default the number of download workers, so each worker keeps a warm connection.  The
+    pool settings of the first call apply to the process, and differing settings of later calls are logged once.
+    """
+    global _client, _client_pool_settings
+    settings = download_settings or {}
+    pool_settings = settings.get('pool', {})
+    workers = int(settings.get('workers', _DEFAULT_WORKERS))
+    num_pools, maxsize = int(pool_settings.get('numPools', 10)), int(pool_settings.get('maxSize', None) or workers)
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient(num_pools, maxsize)
+            _client_pool_settings = num_pools, maxsize
+        elif download_settings is not None and (num_pools, maxsize) != _client_pool_settings \
+                and (num_pools, maxsize) not in _ignored_pool_settings:
+            _ignored_pool_settings.add((num_pools, maxsize))
+            _logger.warning(f'HTTP client pool settings numPools, maxSize {num_pools}, {maxsize} ignored, the '
+                            f'process client has {_client_pool_settings[0]}, {_client_pool_settings[1]}')
+        return _client
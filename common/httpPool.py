@@ -0,0 +1,90 @@
+"""Connection pools that count connection reuse and the time spent waiting for a free connection.
+
+Notes:
+- A connection pool with block=True holds at most maxsize connections per host.  When more threads than maxsize
+request the same host, the extra threads wait in _get_conn() for a connection to be returned.  When maxsize is
+at least the number of threads, every thread keeps its own warm connection.
+- Each pool checkout either reuses an idle connection or creates a new (not yet connected) connection with
+_new_conn().  Thus reused connections are the checkouts less the new connections.
+"""
+import logging
+import threading
+import time
+from urllib3 import HTTPConnectionPool, HTTPSConnectionPool, PoolManager
+
+_logger = logging.getLogger(__name__)
+
+
+# _____________________________________________________________________________
+class PoolStats(object):
+    __slots__ = ['checkouts', 'newConns', 'waitSecs', '_lock']
+
+    # _____________________________________________________________________________
+    def __init__(self):
+        self.checkouts, self.newConns, self.waitSecs = 0, 0, 0.0
+        self._lock = threading.Lock()
+
+    # _____________________________________________________________________________
+    @property
+    def reused_conns(self) -> int:
+        return self.checkouts - self.newConns
+
+    # _____________________________________________________________________________
+    def add_checkout(self, wait_secs: float):
+        with self._lock:
+            self.checkouts += 1
+            self.waitSecs += wait_secs
+
+    # _____________________________________________________________________________
+    def add_new_conn(self):
+        with self._lock:
+            self.newConns += 1
+
+    # _____________________________________________________________________________
+    def __str__(self):
+        return f'checkouts {self.checkouts}, new {self.newConns}, reused {self.reused_conns}, ' \
+               f'wait {self.waitSecs:.2f}s'
+
+
+# _____________________________________________________________________________
+class _StatsPoolMixin:
+    pool_stats: PoolStats = None
+
+    def _get_conn(self, timeout=None):
+        start_time = time.perf_counter()
+        conn = super()._get_conn(timeout)
+        if self.pool_stats:
+            self.pool_stats.add_checkout(time.perf_counter() - start_time)
+        return conn
+
+    def _new_conn(self):
+        if self.pool_stats:
+            self.pool_stats.add_new_conn()
+        return super()._new_conn()
+
+
+class StatsHTTPConnectionPool(_StatsPoolMixin, HTTPConnectionPool):
+    pass
+
+
+class StatsHTTPSConnectionPool(_StatsPoolMixin, HTTPSConnectionPool):
+    pass
+
+
+# _____________________________________________________________________________
+class StatsPoolManager(PoolManager):
+    """PoolManager whose connection pools share a PoolStats
+    """
+
+    # _____________________________________________________________________________
+    def __init__(self, num_pools=10, headers=None, **connection_pool_kw):
+        super().__init__(num_pools, headers, **connection_pool_kw)
+        self.pool_classes_by_scheme = {'http': StatsHTTPConnectionPool, 'https': StatsHTTPSConnectionPool}
+        self.pool_stats = PoolStats()
+
+    # _____________________________________________________________________________
+    def _new_pool(self, scheme, host, port, request_context=None):
+        pool = super()._new_pool(scheme, host, port, request_context)
+        pool.pool_stats = self.pool_stats
+        _logger.debug(f'New pool: {scheme}://{host}:{port} maxsize {pool.pool.maxsize if pool.pool else None}')
+        return pool
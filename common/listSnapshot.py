@@ -0,0 +1,141 @@
+"""Snapshot of the list of the previous run, to limit the work of a run to the items that changed.
+
+Each list item is fingerprinted from its normalised "additionalFields", which hold the item dates, links and
+description.  The snapshot maps the item name to its fingerprint and relative file path, for the items completed by
+the previous run.  A new list is diffed against the snapshot into:
+- added     items not in the snapshot, including items that failed in the previous run
+- changed   items with a different fingerprint or file path, or whose file no longer exists
+- removed   items in the snapshot no longer listed
+Unchanged items are marked cached, checking only that the local file exists, so only the added and changed items are
+fetched and only the files of removed and changed items are checked for archiving.
+
+A full reconcile, checking every local file, is run if there is no snapshot or on demand.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Set
+
+from common.appConfig import AppConfig
+from common.common import FetchItem, Outcome, Result
+
+_logger = logging.getLogger(__name__)
+
+
+# _____________________________________________________________________________
+def _normalise(value: Any) -> Any:
+    if isinstance(value, str):
+        return ' '.join(value.split())
+    if isinstance(value, Mapping):
+        return {k: _normalise(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_normalise(v) for v in value]
+    return value
+
+
+# _____________________________________________________________________________
+def fingerprint_item(item: Mapping[str, Any]) -> str:
+    """Returns a hash of the list item "additionalFields", with keys sorted and whitespace normalised
+    """
+    fields = json.dumps(_normalise(item.get('additionalFields', {})), sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(fields.encode('utf-8')).hexdigest()
+
+
+# _____________________________________________________________________________
+@dataclass
+class ListDelta:
+    __slots__ = ['added', 'changed', 'removed', 'unchanged', 'stale_paths']
+    added: List[str]
+    changed: List[str]
+    removed: List[str]
+    unchanged: int
+    stale_paths: Set[Path]
+
+    # _____________________________________________________________________________
+    def __str__(self):
+        return f'added {len(self.added)}, changed {len(self.changed)}, removed {len(self.removed)}, ' \
+               f'unchanged {self.unchanged}'
+
+
+# _____________________________________________________________________________
+class ListSnapshot(object):
+
+    # _____________________________________________________________________________
+    def __init__(self, app_config: AppConfig, fingerprints: Mapping[str, str]):
+        _logger.debug('__init__')
+        self._app_config = app_config
+        self._fingerprints = fingerprints
+        self._snapshot_path = app_config.snapshot_file_path
+        self._paths: Dict[str, Optional[str]] = {}
+
+    # _____________________________________________________________________________
+    def __load(self) -> Optional[Dict[str, List[Any]]]:
+        if not self._snapshot_path.exists():
+            return None
+        try:
+            return json.loads(self._snapshot_path.read_text())['items']
+        except (ValueError, KeyError):
+            _logger.warning(f'Cannot read list snapshot, ignored: "{self._snapshot_path}"')
+            return None
+
+    # _____________________________________________________________________________
+    def __rel_path(self, record: FetchItem) -> Optional[str]:
+        if not record.filepath:
+            return None
+        filepath = Path(record.filepath)
+        if filepath.is_absolute():
+            filepath = filepath.relative_to(self._app_config.downloads_path)
+        return filepath.as_posix()
+
+    # _____________________________________________________________________________
+    def diff(self, records: List[FetchItem], is_reconcile: bool = False) -> Optional[ListDelta]:
+        """Diff the records against the snapshot, marking unchanged records cached.  Returns None, and no records
+        are marked, if there is no snapshot or is_reconcile.
+        """
+        _logger.debug('diff')
+        self._paths = {r.name: self.__rel_path(r) for r in records}
+        if is_reconcile or (items := self.__load()) is None:
+            _logger.info('List delta: full reconcile')
+            return None
+
+        delta = ListDelta([], [], [], 0, set())
+        for r in records:
+            if (item := items.get(r.name, None)) is None:
+                delta.added.append(r.name)
+            elif item != [self._fingerprints.get(r.name, None), self._paths[r.name]]:
+                delta.changed.append(r.name)
+                if item[1] and item[1] != self._paths[r.name]:
+                    delta.stale_paths.add(Path(self._app_config.downloads_path, item[1]))
+            elif r.to_download and not Path(self._app_config.downloads_path, r.filepath).exists():
+                delta.changed.append(r.name)
+            else:
+                delta.unchanged += 1
+                if r.to_download:
+                    r.outcome, r.result = Outcome.cached, Result.success
+        for name in items.keys() - self._paths.keys():
+            delta.removed.append(name)
+            if path := items[name][1]:
+                delta.stale_paths.add(Path(self._app_config.downloads_path, path))
+        _logger.info(f'List delta: {delta}')
+        return delta
+
+    # _____________________________________________________________________________
+    def save(self, records: List[FetchItem]):
+        """Write the snapshot of the records completed successfully, or with nothing to download, so records that
+        failed are added, and fetched, in the next run.  The records need not have been diffed, such as records
+        merged from shards.
+        """
+        _logger.debug('save')
+        paths = self._paths or {r.name: self.__rel_path(r) for r in records}
+        items = {r.name: [self._fingerprints.get(r.name, None), paths.get(r.name, None)] for r in records
+                 if not r.to_download or r.result == Result.success}
+        snapshot = {'written': datetime.now().isoformat(timespec='seconds'), 'items': items}
+        try:
+            tmp_path = self._snapshot_path.with_suffix('.tmp')
+            tmp_path.write_text(json.dumps(snapshot))
+            tmp_path.replace(self._snapshot_path)
+        except OSError:
+            _logger.exception(f'Error writing list snapshot: "{self._snapshot_path}"')
@@ -6,9 +6,12 @@ formating and caching.  Subsequent calls to logging handlers use the same cached
 string is stored in LogRecord record.exec_text and must be cleared if a different exception format is required.  Thus
 custom logging formatters should be added after standard Logging formatters.
 """
-from logging import LogRecord, Formatter, FileHandler
+from logging import LogRecord, Formatter, FileHandler, Handler, Logger, StreamHandler, getLogger
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
+from queue import SimpleQueue
 from sys import exc_info
+from typing import List
 
 
 # _____________________________________________________________________________
@@ -55,3 +58,43 @@ class PathFileHandler(FileHandler):
     def __init__(self, filename, mode='a', encoding=None, delay=False):
         Path.mkdir(Path(filename).parent, parents=True, exist_ok=True)
         super().__init__(filename, mode, encoding, delay)
+
+
+# _____________________________________________________________________________
+class RecordQueueHandler(QueueHandler):
+    """Enqueue log records unchanged so the formatting, as well as the writing, is done by the listener thread.
+    QueueHandler.prepare() formats the message on the logging thread so the record can be pickled, which is not
+    required for a queue within the process.
+    """
+    def prepare(self, record: LogRecord):
+        return record
+
+
+# _____________________________________________________________________________
+def start_queue_listener(logger: Logger = None) -> QueueListener:
+    """Move the handlers of the logger, default root, to a listener thread fed by a queue.  The listener must be
+    stopped to flush the queue.
+    """
+    logger = logger or getLogger()
+    queue = SimpleQueue()
+    listener = QueueListener(queue, *logger.handlers, respect_handler_level=True)
+    queue_handler = RecordQueueHandler(queue)
+    queue_handler.listener = listener
+    logger.handlers = [queue_handler]
+    listener.start()
+    return listener
+
+
+# _____________________________________________________________________________
+def console_handlers(logger: Logger = None) -> List[StreamHandler]:
+    """Returns the stream handlers of the logger, default root, writing to a terminal, including handlers moved to a
+    queue listener
+    """
+    handlers: List[Handler] = []
+    for handler in (logger or getLogger()).handlers:
+        if listener := getattr(handler, 'listener', None):
+            handlers.extend(listener.handlers)
+        else:
+            handlers.append(handler)
+    return [h for h in handlers if isinstance(h, StreamHandler) and not isinstance(h, FileHandler)
+            and getattr(h.stream, 'isatty', lambda: False)()]
@@ -0,0 +1,197 @@
+"""Indexed store of record metadata for querying without parsing the data CSV files.
+
+The store is a SQLite table with a column per record field and secondary indexes on the fields commonly filtered.
+Values are stored as text: dates in ISO format so they compare in date order, lists joined by "|" and enums by
+name.  Only records added or changed since the last update are written.
+
+Filters are equality matches and date ranges are half open, so both are searched on an index: text fields are
+indexed case insensitive (NOCASE) and dates as is.  The multi valued category is split into a side table of
+(name, value) rows, indexed on the value.
+"""
+from datetime import date
+from enum import Enum
+import logging
+from pathlib import Path
+import re
+import sqlite3
+import time
+from typing import List, Mapping, Tuple, Type, Any
+
+from common.appConfig import AppConfig
+from common.common import FetchItem
+
+_logger = logging.getLogger(__name__)
+_INDEX_FIELDS = ['contentType', 'featureFlag', 'learningLevel']
+_DATE_FIELDS = ['dateRemote', 'dateSort']
+_MULTI_FIELD = 'category'
+_MULTI_SEPARATORS = re.compile(r'[|^]')
+
+
+# _____________________________________________________________________________
+def to_text(value: Any) -> str:
+    if value is None:
+        return ''
+    if isinstance(value, Enum):
+        return value.name
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        return value.decode('utf-8', 'ignore')
+    if isinstance(value, (list, tuple)):
+        return '|'.join(map(str, value))
+    return str(value)
+
+
+# _____________________________________________________________________________
+def split_values(text: str) -> List[str]:
+    """Returns the values of a multi valued field stored as text, joined by "|" or "^"
+    """
+    return list(dict.fromkeys(v.strip() for v in _MULTI_SEPARATORS.split(text or '') if v.strip()))
+
+
+# _____________________________________________________________________________
+class MetadataIndex:
+
+    # _____________________________________________________________________________
+    def __init__(self, index_path: Path, cls: Type[FetchItem]):
+        _logger.debug(f'__init__ "{index_path}"')
+        self._fields = list(cls.__slots__)
+        self._conn = sqlite3.connect(str(index_path))
+
+        columns = ', '.join(f'"{f}" TEXT' for f in self._fields)
+        with self._conn:
+            self._conn.execute(f'CREATE TABLE IF NOT EXISTS records ({columns}, PRIMARY KEY ("name"))')
+            for field in filter(lambda f: f in self._fields, _DATE_FIELDS):
+                self._conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{field} ON records ("{field}")')
+            for field in filter(lambda f: f in self._fields, _INDEX_FIELDS + [_MULTI_FIELD]):
+                self._conn.execute(f'DROP INDEX IF EXISTS idx_{field}')
+            for field in filter(lambda f: f in self._fields, _INDEX_FIELDS):
+                self._conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{field}_nocase ON records '
+                                   f'("{field}" COLLATE NOCASE)')
+            if _MULTI_FIELD in self._fields:
+                self.__create_values_table()
+
+    # _____________________________________________________________________________
+    def __create_values_table(self):
+        """Create the table of values of the multi valued field, filled from the records if the table is new
+        """
+        sql = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'record_values'"
+        if self._conn.execute(sql).fetchone():
+            return
+        self._conn.execute('CREATE TABLE record_values ("name" TEXT NOT NULL, "value" TEXT NOT NULL COLLATE NOCASE, '
+                           'PRIMARY KEY ("name", "value"))')
+        self._conn.execute('CREATE INDEX idx_record_values_value ON record_values ("value", "name")')
+        rows = self._conn.execute(f'SELECT "name", "{_MULTI_FIELD}" FROM records').fetchall()
+        self.__write_values(rows)
+
+    # _____________________________________________________________________________
+    def __write_values(self, rows: List[Tuple[str, str]]):
+        self._conn.executemany('INSERT OR IGNORE INTO record_values ("name", "value") VALUES (?, ?)',
+                               [(name, v) for name, text in rows for v in split_values(text)])
+
+    # _____________________________________________________________________________
+    def close(self):
+        self._conn.close()
+
+    # _____________________________________________________________________________
+    def __enter__(self):
+        return self
+
+    # _____________________________________________________________________________
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    # _____________________________________________________________________________
+    @property
+    def fields(self) -> List[str]:
+        return self._fields
+
+    # _____________________________________________________________________________
+    def update(self, records: List[FetchItem]) -> Tuple[int, int]:
+        """Write records added or changed and delete records no longer listed.  Returns number of records written
+        and deleted.
+        """
+        _logger.debug('update')
+
+        columns = ', '.join(f'"{f}"' for f in self._fields)
+        stored = {row[0]: row for row in self._conn.execute(f'SELECT "name", {columns} FROM records')}
+        rows = {r.name: (r.name, *[to_text(getattr(r, f)) for f in self._fields]) for r in records}
+        changed = [row[1:] for name, row in rows.items() if stored.get(name, None) != row]
+        deleted = [(name,) for name in stored.keys() - rows.keys()]
+
+        with self._conn:
+            placeholders = ', '.join('?' * len(self._fields))
+            self._conn.executemany(f'INSERT OR REPLACE INTO records ({columns}) VALUES ({placeholders})', changed)
+            self._conn.executemany('DELETE FROM records WHERE "name" = ?', deleted)
+            if _MULTI_FIELD in self._fields:
+                index = self._fields.index(_MULTI_FIELD)
+                name_index = self._fields.index('name')
+                self._conn.executemany('DELETE FROM record_values WHERE "name" = ?',
+                                       deleted + [(row[name_index],) for row in changed])
+                self.__write_values([(row[name_index], row[index]) for row in changed])
+        _logger.debug(f'Metadata index: written {len(changed)}, deleted {len(deleted)}')
+
+        return len(changed), len(deleted)
+
+    # _____________________________________________________________________________
+    def query(self, where: Mapping[str, str] = None, since: str = None, until: str = None,
+                date_field: str = 'dateRemote') -> List[Mapping[str, str]]:
+        """Returns records, newest first, where each field equals the value (case insensitive), or one of the
+        values of the category, and the date field is in the range since to until inclusive.  Dates can be
+        partial, such as "2021-06".
+        """
+        clauses, params = [], []
+        for field, value in (where or {}).items():
+            if field not in self._fields:
+                raise ValueError(f'Unknown field "{field}", expected one of: {", ".join(self._fields)}')
+            if field == _MULTI_FIELD:
+                clauses.append('"name" IN (SELECT "name" FROM record_values WHERE "value" = ?)')
+            else:
+                clauses.append(f'"{field}" = ? COLLATE NOCASE')
+            params.append(value)
+        if since:
+            clauses.append(f'"{date_field}" >= ?')
+            params.append(since)
+        if until:
+            # Partial date is the prefix of every date it includes, all less than the prefix followed by U+FFFF
+            clauses.append(f'"{date_field}" < ?')
+            params.append(until + '\uffff')
+
+        sql = 'SELECT * FROM records' + (' WHERE ' + ' AND '.join(clauses) if clauses else '') + \
+              f' ORDER BY "{date_field}" DESC'
+        cursor = self._conn.execute(sql, params)
+        names = [d[0] for d in cursor.description]
+        return [dict(zip(names, row)) for row in cursor]
+
+
+# _____________________________________________________________________________
+def update_metadata(records: List[FetchItem], cls: Type[FetchItem], app_config: AppConfig):
+    """Update the application metadata index.  Errors are logged and not raised as the index is not required to
+    complete the run.
+    """
+    _logger.debug('update_metadata')
+    if not records:
+        return
+    try:
+        with MetadataIndex(app_config.metadata_index_file_path, cls) as mi:
+            mi.update(records)
+    except Exception as ex:
+        _logger.exception(f'Error updating metadata index: "{app_config.metadata_index_file_path}"')
+
+
+# _____________________________________________________________________________
+def query_metadata(where: List[str], since: str, until: str, cls: Type[FetchItem], app_config: AppConfig):
+    """Log records matching the "field=value" filters and date range
+    """
+    _logger.debug('query_metadata')
+    if bad := [w for w in where or [] if '=' not in w]:
+        raise ValueError(f'Expected filter FIELD=VALUE: {", ".join(bad)}')
+    filters = dict(w.split('=', 1) for w in where or [])
+    start_time = time.perf_counter()
+    with MetadataIndex(app_config.metadata_index_file_path, cls) as mi:
+        rows = mi.query(filters, since, until)
+    _logger.info(f'Query: {len(rows)} records in {(time.perf_counter() - start_time) * 1000:.1f}ms')
+    for row in rows:
+        _logger.info(f'{row["dateRemote"]}  {row.get("contentType", "")[:20]:20s}  {row["title"]}')
+        if row['filepath']:
+            _logger.info(f'{"":34s}"{row["filepath"]}"')
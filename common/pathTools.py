@@ -1,8 +1,11 @@
-import io
+import concurrent.futures
+from functools import lru_cache
+import gzip
 import os
 from pathlib import Path
 import string
-from typing import Tuple
+import tarfile
+from typing import Tuple, Iterator, Callable, Any, BinaryIO
 import unicodedata
 from urllib import parse
 import zipfile
@@ -16,6 +19,10 @@ _FILENAME_REPLACE_CHARS = _WINDOWS_INVALID_FILENAME_CHARS + _DASH_CHARS
 _PATHNAME_REPLACE_CHARS = _WINDOWS_INVALID_CHARS + _DASH_CHARS
 _URL_STRIP_CHARS = string.whitespace + '/'
 _SPACE_CHARS = ['\u00A0', '\u2002', '\u2003']  # Does not include HTML specialized spaces
+_CACHE_SIZE = 8 * 1024  # Titles and URLs are mostly distinct: holds those of the lists rebuilt by each daemon check
+_ZIP_SUFFIXES = ['.zip']
+_TAR_SUFFIXES = ['.tar', '.tgz', '.tbz', '.tbz2', '.txz', '.tar.gz', '.tar.bz2', '.tar.xz']
+_GZIP_SUFFIXES = ['.gz', '.gzip']
 
 
 # _____________________________________________________________________________
@@ -47,6 +54,7 @@ def delete_empty_directories(root: os.PathLike):
 
 
 # _____________________________________________________________________________
+@lru_cache(maxsize=_CACHE_SIZE)
 def sanitize_filename(filename: str, remove_dot=False):
     """Returns MS-Windows sanitized filename using ASCII character set
     :param filename: string
@@ -85,6 +93,7 @@ def join_urlpath(url, *paths: str):
 
 
 # _____________________________________________________________________________
+@lru_cache(maxsize=_CACHE_SIZE)
 def urlpath_to_pathname(url: str):
     """Returns MS-Windows sanitized filepath from a URL
     :param url: string
@@ -126,29 +135,65 @@ def url_suffix(url: str):
 
 
 # _____________________________________________________________________________
-def open_files(path: str or os.PathLike) -> Tuple[str, int]:
-    """Iterate over a root path returning an open file handle for each file found - including file in archives
-    :return: Tuple[filename:str,file handle:int]
+def open_files(path: str or os.PathLike) -> Iterator[Tuple[str, BinaryIO]]:
+    """Iterate over a root path returning an open file handle for each file found - including files in archives
+    :return: Iterator[Tuple[relative filename:str, file handle]]
+
+    Archive members are read on demand so memory use is bounded by the decompression buffers and not the archive
+    size.  Zip archives are read through the central directory, tar archives (optionally compressed) are streamed in
+    member order, and gzip files yield their single decompressed member.  The archive member name follows the
+    archive relative filename after a "|".
     """
-    for root, _, filenames in os.walk(str(path)):
+    root_path = Path(path).resolve()
+    for root, _, filenames in os.walk(str(root_path)):
         # Iterate over files found in directory
         for filename in filenames:
-            path = Path(root, filename).resolve()
-            rel_path_str = str(Path(path.relative_to(path), path.name))
+            file_path = Path(root, filename)
+            rel_path_str = str(file_path.relative_to(root_path))
+            lower_name = filename.lower()
 
             # Test if file is an archive
-            if file_suffix(filename) in ['.zip', '.gzip', '.gz']:
-                with zipfile.ZipFile(io.BytesIO(path.read_bytes())) as zp:
+            if any(map(lower_name.endswith, _TAR_SUFFIXES)):
+                with tarfile.open(file_path, mode='r|*') as tp:
+                    # Iterate over files inside archive, in stream order
+                    for tarinfo in tp:
+                        if tarinfo.isfile() and (file_handle := tp.extractfile(tarinfo)):
+                            with file_handle:
+                                yield f'{rel_path_str}|{tarinfo.name}', file_handle
+            elif file_suffix(lower_name) in _ZIP_SUFFIXES:
+                with zipfile.ZipFile(file_path) as zp:
                     # Iterate over files inside archive
                     for zipinfo in filter(lambda z: not z.is_dir(), zp.infolist()):
                         with zp.open(zipinfo) as file_handle:
                             yield f'{rel_path_str}|{zipinfo.filename}', file_handle
+            elif file_suffix(lower_name) in _GZIP_SUFFIXES:
+                with gzip.open(file_path) as file_handle:
+                    yield f'{rel_path_str}|{file_path.stem}', file_handle
             else:
                 # Yield non-archive file
-                with open(path) as file_handle:
+                with open(file_path, 'rb') as file_handle:
                     yield rel_path_str, file_handle
 
 
+# _____________________________________________________________________________
+def map_files(path: str or os.PathLike, func: Callable[[str, bytes], Any],
+            max_workers: int = 4) -> Iterator[Tuple[str, Any]]:
+    """Iterate over open_files() applying func(filename, content) in a thread pool and returning the results in
+    completion order.  At most twice max_workers file contents are held in memory at one time.
+    :return: Iterator[Tuple[relative filename:str, func result]]
+    """
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {}
+        for filename, file_handle in open_files(path):
+            if len(futures) >= max_workers * 2:
+                done, _ = concurrent.futures.wait(futures, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    yield futures.pop(future), future.result()
+            futures[executor.submit(func, filename, file_handle.read())] = filename
+        for future in concurrent.futures.as_completed(futures):
+            yield futures[future], future.result()
+
+
 # _____________________________________________________________________________
 def file_suffix(fp: str):
     """Extract the file suffix from a path
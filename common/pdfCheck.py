@@ -0,0 +1,45 @@
+"""Structural checks of downloaded PDF files.
+
+A failed transfer can leave an HTML error page or a truncated body saved as a PDF.  A PDF starts with a "%PDF-"
+header and ends with "startxref", the byte offset of the cross-reference section, and an "%%EOF" marker.  Only
+the head and tail of the file are read, through a memory map, so the check cost does not grow with file size.
+
+Notes:
+- Functions are module level so they can be pickled for a process pool.
+- The cross-reference section is either a table ("xref") or, since PDF 1.5, a stream object ("n g obj").
+"""
+import mmap
+import os
+import re
+from typing import Optional
+
+_HEAD_SIZE = 1024
+_TAIL_SIZE = 2048
+_startxref_re = re.compile(rb'startxref\s+(\d+)\s+%%EOF')
+_xref_re = re.compile(rb'\s*(?:xref|\d+\s+\d+\s+obj)')
+
+
+# _____________________________________________________________________________
+def check_pdf(filepath: str) -> Optional[str]:
+    """Returns None if the PDF file structure is valid, else the reason it is not
+    """
+    try:
+        size = os.path.getsize(filepath)
+        if size == 0:
+            return 'empty file'
+        with open(filepath, 'rb') as fp, mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm.find(b'%PDF-', 0, min(size, _HEAD_SIZE)) < 0:
+                return 'header "%PDF-" not found'
+            tail_start = max(0, size - _TAIL_SIZE)
+            if mm.rfind(b'%%EOF', tail_start) < 0:
+                return 'trailer "%%EOF" not found'
+            matches = list(_startxref_re.finditer(mm[tail_start:]))
+            if not matches:
+                return '"startxref" not found'
+            offset = int(matches[-1].group(1))
+            if offset >= size or not _xref_re.match(mm, offset):
+                return f'cross-reference not found at offset {offset}'
+    except (OSError, ValueError) as ex:
+        return f'{type(ex).__name__}: {ex}'
+
+    return None
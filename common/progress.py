@@ -0,0 +1,177 @@
+"""Progress of a fetch with throughput and estimated time remaining.
+
+Counting is on the hot path so each thread increments its own counters, without a lock, and a reporter thread sums
+the counters of all threads periodically.  A thread reading another thread's counter may see a slightly stale value,
+which is corrected at the next report.  Bytes are counted from the HttpClient "chunk" hook event, as each chunk is
+written, so the throughput is live during large downloads and independent of how the files are downloaded.
+
+On a terminal the progress is a single status line updated in place, otherwise it is logged periodically.  While the
+line is shown, the streams of the console log handlers are wrapped so the line is cleared before a log line is
+written, and redrawn at the next update, rather than the log line being spliced into it.
+"""
+import logging
+import sys
+import threading
+import time
+from typing import Any, List, Mapping, TextIO
+
+from common.logTools import console_handlers
+from common.metricPrefix import to_decimal_units
+
+_logger = logging.getLogger(__name__)
+
+
+# _____________________________________________________________________________
+class ThreadCounters(object):
+    """Counters of records and bytes, one pair per thread
+    """
+
+    # _____________________________________________________________________________
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._counters: List[List[int]] = []
+
+    # _____________________________________________________________________________
+    def __thread_counters(self) -> List[int]:
+        if (counters := getattr(self._local, 'counters', None)) is None:
+            counters = self._local.counters = [0, 0]
+            with self._lock:
+                self._counters.append(counters)
+        return counters
+
+    # _____________________________________________________________________________
+    def add(self, records: int = 0, size: int = 0):
+        counters = self.__thread_counters()
+        counters[0] += records
+        counters[1] += size
+
+    # _____________________________________________________________________________
+    def totals(self):
+        """Returns the number of records and bytes summed over all threads
+        """
+        with self._lock:
+            counters = list(self._counters)
+        return sum(c[0] for c in counters), sum(c[1] for c in counters)
+
+
+# _____________________________________________________________________________
+class _LineClearingStream(object):
+    """Stream of a console log handler clearing the progress line before each write
+    """
+
+    # _____________________________________________________________________________
+    def __init__(self, stream: TextIO, reporter: 'ProgressReporter'):
+        self._stream = stream
+        self._reporter = reporter
+
+    # _____________________________________________________________________________
+    def write(self, s: str) -> int:
+        return self._reporter.write_log(self._stream, s)
+
+    # _____________________________________________________________________________
+    def flush(self):
+        self._stream.flush()
+
+    # _____________________________________________________________________________
+    def __getattr__(self, name: str):
+        return getattr(self._stream, name)
+
+
+# _____________________________________________________________________________
+class ProgressReporter(object):
+
+    # _____________________________________________________________________________
+    def __init__(self, total: int, settings: Mapping[str, Any] = None):
+        settings = settings or {}
+        self._total = total
+        self._is_enabled = settings.get('enabled', True)
+        self._interval_secs = float(settings.get('intervalSecs', 1.0))
+        self._log_interval_secs = float(settings.get('logIntervalSecs', 30.0))
+        self._is_tty = sys.stderr.isatty()
+        self._counters = ThreadCounters()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._start_time = 0.0
+        self._rate = 0.0
+        self._line_lock = threading.Lock()
+        self._is_line_shown = False
+        self._log_streams = {}
+
+    # _____________________________________________________________________________
+    def add_record(self):
+        self._counters.add(records=1)
+
+    # _____________________________________________________________________________
+    def hook(self, event: str, info: Mapping[str, Any]):
+        """HttpClient hook counting the bytes downloaded, per chunk
+        """
+        if event == 'chunk':
+            self._counters.add(size=info['bytes'])
+
+    # _____________________________________________________________________________
+    def status(self) -> str:
+        records, size = self._counters.totals()
+        secs = time.time() - self._start_time
+        eta = (self._total - records) * secs / records if records else None
+        return f'Progress: {records:5d}/{self._total} records  {to_decimal_units(size):>5s}B  ' \
+               f'{to_decimal_units(round(self._rate)):>5s}B/s  ' \
+               f'ETA {"--:--" if eta is None else "%d:%02d" % divmod(round(eta), 60)}'
+
+    # _____________________________________________________________________________
+    def write_log(self, stream: TextIO, s: str) -> int:
+        """Write log text to a console stream, clearing the progress line first if shown
+        """
+        with self._line_lock:
+            if self._is_line_shown:
+                sys.stderr.write('\r\x1b[K')
+                sys.stderr.flush()
+                self._is_line_shown = False
+            n = stream.write(s)
+            stream.flush()
+            return n
+
+    # _____________________________________________________________________________
+    def __write_line(self, end: str = ''):
+        with self._line_lock:
+            sys.stderr.write('\r' + self.status() + '\x1b[K' + end)
+            sys.stderr.flush()
+            self._is_line_shown = not end
+
+    # _____________________________________________________________________________
+    def __report(self):
+        last_time, last_size, last_log = self._start_time, 0, self._start_time
+        while not self._stop_event.wait(self._interval_secs):
+            now = time.time()
+            size = self._counters.totals()[1]
+            # Smooth the current throughput over the last few intervals
+            self._rate = 0.7 * self._rate + 0.3 * (size - last_size) / max(now - last_time, 1e-6)
+            last_time, last_size = now, size
+            if self._is_tty:
+                self.__write_line()
+            elif now - last_log >= self._log_interval_secs:
+                _logger.info(self.status())
+                last_log = now
+
+    # _____________________________________________________________________________
+    def start(self):
+        self._start_time = time.time()
+        if self._is_enabled and self._total:
+            if self._is_tty:
+                for handler in console_handlers():
+                    self._log_streams[handler] = handler.stream
+                    handler.setStream(_LineClearingStream(handler.stream, self))
+            self._thread = threading.Thread(target=self.__report, name='progress', daemon=True)
+            self._thread.start()
+
+    # _____________________________________________________________________________
+    def stop(self):
+        if self._thread:
+            self._stop_event.set()
+            self._thread.join()
+            self._thread = None
+            if self._is_tty:
+                self.__write_line('\n')
+            for handler, stream in self._log_streams.items():
+                handler.setStream(stream)
+            self._log_streams = {}
@@ -0,0 +1,107 @@
+"""Bandwidth limiting shared across download threads.
+
+Notes:
+- The limiter is a token bucket where a caller reserves bytes before writing them.  A reservation can make the bucket
+negative and the caller then sleeps until the debt is repaid, so threads are paced in order of arrival.
+- The urllib3 read timeout applies to each socket read and not to the whole transfer.  Callers should read at most
+chunk_size() bytes at a time so the sleep between reads stays well below the read timeout.
+"""
+from dataclasses import dataclass
+from datetime import datetime, time as dt_time
+import logging
+import threading
+import time
+from typing import List, Mapping, Any
+
+_logger = logging.getLogger(__name__)
+_MIN_CHUNK_SIZE = 16 * 1024
+
+
+# _____________________________________________________________________________
+@dataclass
+class RateWindow:
+    __slots__ = ['start', 'end', 'bytes_per_sec']
+    start: dt_time
+    end: dt_time
+    bytes_per_sec: int
+
+    # _____________________________________________________________________________
+    def contains(self, t: dt_time) -> bool:
+        """Returns True if time is in the window.  The window can span midnight.
+        """
+        if self.start <= self.end:
+            return self.start <= t < self.end
+        return t >= self.start or t < self.end
+
+    # _____________________________________________________________________________
+    @staticmethod
+    def from_settings(settings: Mapping[str, Any]):
+        return RateWindow(dt_time.fromisoformat(settings['start']), dt_time.fromisoformat(settings['end']),
+                    int(settings.get('bytesPerSec', 0)))
+
+
+# _____________________________________________________________________________
+class RateLimiter:
+    """Limits the combined byte rate of all callers.  A rate of 0 is unlimited.
+    """
+
+    # _____________________________________________________________________________
+    def __init__(self, bytes_per_sec: int = 0, windows: List[RateWindow] = None, max_wait: float = 0.25):
+        self._bytes_per_sec = bytes_per_sec
+        self._windows = windows or []
+        self._max_wait = max_wait
+        self._lock = threading.Lock()
+        self._tokens = 0.0
+        self._timestamp = time.monotonic()
+
+    # _____________________________________________________________________________
+    @property
+    def is_limited(self) -> bool:
+        return self._bytes_per_sec > 0 or any(w.bytes_per_sec > 0 for w in self._windows)
+
+    # _____________________________________________________________________________
+    def current_rate(self) -> int:
+        """Returns the byte rate for the current local time.  The first matching window wins.
+        """
+        if self._windows:
+            now = datetime.now().time()
+            for w in self._windows:
+                if w.contains(now):
+                    return w.bytes_per_sec
+        return self._bytes_per_sec
+
+    # _____________________________________________________________________________
+    def chunk_size(self, size: int) -> int:
+        """Returns the read size so that one chunk takes no longer than the maximum wait at the current rate
+        """
+        if rate := self.current_rate():
+            return max(_MIN_CHUNK_SIZE, min(size, int(rate * self._max_wait)))
+        return size
+
+    # _____________________________________________________________________________
+    def acquire(self, size: int):
+        """Reserve size bytes, sleeping if the rate has been exceeded
+        """
+        if not (rate := self.current_rate()):
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(rate * self._max_wait, self._tokens + (now - self._timestamp) * rate)
+            self._timestamp = now
+            self._tokens -= size
+            wait = -self._tokens / rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+
+    # _____________________________________________________________________________
+    @staticmethod
+    def from_settings(settings: Mapping[str, Any]):
+        """Create from the "rateLimit" configuration settings, for example:
+        {"bytesPerSec": 2000000, "windows": [{"start": "22:00", "end": "06:00", "bytesPerSec": 0}]}
+        """
+        windows = [RateWindow.from_settings(w) for w in settings.get('windows', [])]
+        limiter = RateLimiter(int(settings.get('bytesPerSec', 0)), windows)
+        if limiter.is_limited:
+            _logger.info(f'Rate limit: {limiter._bytes_per_sec} B/s, windows: {len(windows)}')
+        return limiter
@@ -0,0 +1,242 @@
+"""Columnar store of fetch records for large lists.
+
+Each FetchItem record is an object with up to 18 attributes including date, Path and Enum objects.  For large lists
+the per object overhead dominates memory use.  The store instead keeps one column per field:
+- dates as an array of day ordinals (0 for None)
+- booleans and enums as byte arrays of values and member indexes
+- frequently repeated strings, such as content type and category, as an array of codes into a list of the distinct
+values
+- paths as the code of the directory, in a list of directory Path objects, and the file name, with the Path joined
+only when accessed and kept by the record view
+
+Records are accessed through lightweight RecordView objects that have the same attributes and to_list() as the
+record class, so can be used wherever a record is expected.
+"""
+from array import array
+import dataclasses
+from datetime import date
+from enum import Enum
+from pathlib import Path
+from typing import Iterator, List, Type, Any
+
+from common.common import FetchItem
+
+_CODED_FIELDS = ['category', 'contentType', 'featureFlag', 'learningLevel']
+_NONE_BYTE = 255
+
+
+# _____________________________________________________________________________
+class _DateColumn(object):
+    __slots__ = ['values']
+
+    def __init__(self):
+        self.values = array('l')
+
+    def append(self, value: date):
+        self.values.append(value.toordinal() if value else 0)
+
+    def get(self, i: int):
+        return date.fromordinal(v) if (v := self.values[i]) else None
+
+    def set(self, i: int, value: date):
+        self.values[i] = value.toordinal() if value else 0
+
+
+class _BoolColumn(object):
+    __slots__ = ['values']
+
+    def __init__(self):
+        self.values = bytearray()
+
+    def append(self, value: bool):
+        self.values.append(_NONE_BYTE if value is None else int(value))
+
+    def get(self, i: int):
+        return None if (v := self.values[i]) == _NONE_BYTE else bool(v)
+
+    def set(self, i: int, value: bool):
+        self.values[i] = _NONE_BYTE if value is None else int(value)
+
+
+class _EnumColumn(object):
+    __slots__ = ['values', 'members', 'indexes']
+
+    def __init__(self, enum_cls: Type[Enum]):
+        self.values = bytearray()
+        self.members = list(enum_cls)
+        self.indexes = {m: i for i, m in enumerate(self.members)}
+
+    def append(self, value: Enum):
+        self.values.append(_NONE_BYTE if value is None else self.indexes[value])
+
+    def get(self, i: int):
+        return None if (v := self.values[i]) == _NONE_BYTE else self.members[v]
+
+    def set(self, i: int, value: Enum):
+        self.values[i] = _NONE_BYTE if value is None else self.indexes[value]
+
+
+class _CodedColumn(object):
+    __slots__ = ['codes', 'values', 'indexes']
+
+    def __init__(self):
+        self.codes = array('I')
+        self.values = []
+        self.indexes = {}
+
+    def encode(self, value: Any) -> int:
+        if (code := self.indexes.get(value, None)) is None:
+            code = self.indexes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def append(self, value: Any):
+        self.codes.append(self.encode(value))
+
+    def get(self, i: int):
+        return self.values[self.codes[i]]
+
+    def set(self, i: int, value: Any):
+        self.codes[i] = self.encode(value)
+
+
+class _PathColumn(object):
+    __slots__ = ['directories', 'names']
+
+    def __init__(self):
+        self.directories = _CodedColumn()
+        self.names = []
+
+    def append(self, value: Path):
+        self.directories.append(None if value is None else value.parent)
+        self.names.append(None if value is None else value.name)
+
+    def get(self, i: int):
+        return None if (name := self.names[i]) is None else self.directories.get(i) / name
+
+    def set(self, i: int, value: Path):
+        self.directories.set(i, None if value is None else value.parent)
+        self.names[i] = None if value is None else value.name
+
+
+class _ObjectColumn(object):
+    __slots__ = ['values']
+
+    def __init__(self):
+        self.values = []
+
+    def append(self, value: Any):
+        self.values.append(value)
+
+    def get(self, i: int):
+        return self.values[i]
+
+    def set(self, i: int, value: Any):
+        self.values[i] = value
+
+
+# _____________________________________________________________________________
+def _new_column(field: dataclasses.Field):
+    if field.type is date:
+        return _DateColumn()
+    if field.type is bool:
+        return _BoolColumn()
+    if isinstance(field.type, type) and issubclass(field.type, Enum):
+        return _EnumColumn(field.type)
+    if field.type is Path:
+        return _PathColumn()
+    if field.name in _CODED_FIELDS:
+        return _CodedColumn()
+    return _ObjectColumn()
+
+
+# _____________________________________________________________________________
+class RecordView(object):
+    """A row of a RecordStore with the attributes of the record class.  Paths are joined once per view.
+    """
+    __slots__ = ['_store', '_i', '_paths']
+
+    def __init__(self, store, i: int):
+        object.__setattr__(self, '_store', store)
+        object.__setattr__(self, '_i', i)
+        object.__setattr__(self, '_paths', None)
+
+    def __getattr__(self, name: str):
+        if (column := self._store.columns.get(name, None)) is None:
+            raise AttributeError(name)
+        if type(column) is not _PathColumn:
+            return column.get(self._i)
+        if self._paths is None:
+            object.__setattr__(self, '_paths', {})
+        if name not in self._paths:
+            self._paths[name] = column.get(self._i)
+        return self._paths[name]
+
+    def __setattr__(self, name: str, value: Any):
+        if (column := self._store.columns.get(name, None)) is None:
+            raise AttributeError(name)
+        column.set(self._i, value)
+        if self._paths:
+            self._paths.pop(name, None)
+
+    def to_list(self) -> List[Any]:
+        return self._store.cls.to_list(self)
+
+    def __repr__(self):
+        fields = ', '.join(f'{f}={getattr(self, f)!r}' for f in self._store.cls.__slots__)
+        return f'{self._store.cls.__name__}View({fields})'
+
+
+# _____________________________________________________________________________
+class RecordStore(object):
+    """Columnar list of records of one record class.  The class is taken from the first record appended if not
+    given.
+    """
+
+    # _____________________________________________________________________________
+    def __init__(self, cls: Type[FetchItem] = None):
+        self.cls = None
+        self.columns = {}
+        self._len = 0
+        if cls:
+            self.__init_columns(cls)
+
+    # _____________________________________________________________________________
+    def __init_columns(self, cls: Type[FetchItem]):
+        self.cls = cls
+        self.columns = {f.name: _new_column(f) for f in dataclasses.fields(cls)}
+
+    # _____________________________________________________________________________
+    def append(self, record: FetchItem):
+        if not self.cls:
+            self.__init_columns(type(record))
+        for name, column in self.columns.items():
+            column.append(getattr(record, name))
+        self._len += 1
+
+    # _____________________________________________________________________________
+    def extend(self, records: List[FetchItem]):
+        for record in records:
+            self.append(record)
+
+    # _____________________________________________________________________________
+    def __len__(self) -> int:
+        return self._len
+
+    # _____________________________________________________________________________
+    def __getitem__(self, i: int) -> RecordView:
+        if i < 0:
+            i += self._len
+        if not 0 <= i < self._len:
+            raise IndexError(i)
+        return RecordView(self, i)
+
+    # _____________________________________________________________________________
+    def __setitem__(self, i: int, record: FetchItem):
+        view = self[i]
+        for name, column in self.columns.items():
+            column.set(view._i, getattr(record, name))
+
+    # _____________________________________________________________________________
+    def __iter__(self) -> Iterator[RecordView]:
+        return (RecordView(self, i) for i in range(self._len))
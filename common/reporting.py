@@ -6,7 +6,8 @@ from operator import attrgetter
 from typing import List, Type
 
 from common.appConfig import AppConfig
-from common.common import DeleteRecord, Outcome, Result, FetchItem
+from common.common import DeleteRecord, Outcome, Result, FetchItem, FetchStats
+from common.metricPrefix import to_decimal_units
 
 # Common variables
 _logger = logging.getLogger(__name__)
@@ -16,11 +17,12 @@ _CSV_BACKUP_SUFFIX = '.bak.csv'
 class Reporting:
     # _____________________________________________________________________________
     def __init__(self, frecs: List[FetchItem], cls, drecs: List[DeleteRecord],
-                app_config: AppConfig):
+                app_config: AppConfig, fetch_stats: FetchStats = None):
         self._frecs = frecs
         self._cls = cls
         self._drecs = drecs
         self._app_config = app_config
+        self._fetch_stats = fetch_stats
 
     # _____________________________________________________________________________
     def __merge_fetch_results(self):
@@ -114,4 +116,12 @@ class Reporting:
             buf.write(f'- Warnings: {counter_result[Result.warning]:5d}\n')
             buf.write(f'- Errors:   {counter_result[Result.error]:5d}\n')
             buf.write(f'- Nil:      {counter_result[Result.nil]:5d}\n')
+            if fs := self._fetch_stats:
+                rate = round(fs.bytes / fs.runSecs) if fs.runSecs > 0 else 0
+                buf.write(f'Downloads:  {fs.files:5d}\n')
+                buf.write(f'- Bytes:    {to_decimal_units(fs.bytes):>5s}B\n')
+                buf.write(f'- Time:     {fs.runSecs:5.1f}s\n')
+                buf.write(f'- Rate:     {to_decimal_units(rate):>5s}B/s\n')
+                buf.write(f'Failing:    {fs.failures:5d}\n')
+                buf.write(f'- Skipped:  {fs.skips:5d}\n')
             return buf.getvalue()
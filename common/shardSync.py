@@ -0,0 +1,140 @@
+"""Sharded synchronisation across processes or hosts.
+
+The list is partitioned by a stable hash (CRC-32) of the record name, so every worker given the same list
+selects the same disjoint slice without coordination.  Each worker fetches its slice and writes a partial result
+file to the shards folder, with the list fingerprints of its records.  The merge step reads all partial results, for
+the reporting, cleanup and list snapshot to run once on the whole list.
+
+Notes:
+- Workers share the downloads folder so the merge step can clean the output.
+- The history file is written by the merge step only, as each worker sees only its slice of the list.  For the
+same reason workers save the entries of their slice of the URL caches to shard files, merged by the merge step:
+saving the application caches, each pruned to a slice, would drop the entries of the other workers.
+"""
+from datetime import datetime
+import json
+import logging
+from pathlib import Path
+from typing import Dict, List, Mapping, Tuple, Type
+import zlib
+
+from common.appConfig import AppConfig
+from common.common import FetchItem, FetchStats
+from common.fetchFiles import FetchFiles
+from common.metadataIndex import to_text
+from common.urlCache import NegativeCache, RedirectCache
+from common.workJournal import WorkJournal
+
+_logger = logging.getLogger(__name__)
+
+
+# _____________________________________________________________________________
+def shard_of(name: str, count: int) -> int:
+    return zlib.crc32(name.encode('utf-8')) % count
+
+
+# _____________________________________________________________________________
+def select_shard(records: List[FetchItem], index: int, count: int) -> List[FetchItem]:
+    return [r for r in records if shard_of(r.name, count) == index]
+
+
+# _____________________________________________________________________________
+def shard_file_path(app_config: AppConfig, index: int, count: int) -> Path:
+    return Path(app_config.shards_path, f'{app_config.name}.shard.{index}of{count}.json')
+
+
+# _____________________________________________________________________________
+def shard_cache_paths(app_config: AppConfig, index: int, count: int) -> Tuple[Path, Path]:
+    """Returns the paths of the negative and redirect cache files of the shard
+    """
+    shard_path = shard_file_path(app_config, index, count)
+    return shard_path.with_suffix('.negative.json'), shard_path.with_suffix('.redirect.json')
+
+
+# _____________________________________________________________________________
+def fetch_shard(records: List[FetchItem], index: int, count: int, app_config: AppConfig,
+            fingerprints: Mapping[str, str] = None) -> FetchStats:
+    """Fetch the shard of the records and write the partial result file and the shard URL cache files
+    """
+    _logger.debug('fetch_shard')
+    shard_records = select_shard(records, index, count)
+    _logger.info(f'Shard {index}/{count}: {len(shard_records)} of {len(records)} records')
+
+    shard_path = shard_file_path(app_config, index, count)
+    shard_path.unlink(missing_ok=True)
+    shard_path.parent.mkdir(parents=True, exist_ok=True)
+    journal_path = shard_path.with_suffix('.journal.jsonl')
+    fd = FetchFiles(app_config, journal_path)
+    fd.process(shard_records, is_partial=True)
+    fd.save_url_caches(shard_records, *shard_cache_paths(app_config, index, count))
+
+    stats = fd.stats
+    partial = {
+        'shard': index,
+        'count': count,
+        'written': datetime.now().isoformat(timespec='seconds'),
+        'stats': {s: getattr(stats, s) for s in FetchStats.__slots__},
+        'sizes': fd.fetch_sizes,
+        'fingerprints': {r.name: fingerprints.get(r.name, None) for r in shard_records} if fingerprints else {},
+        'records': [[to_text(v) for v in r.to_list()] for r in shard_records]
+    }
+    tmp_path = shard_path.with_suffix('.tmp')
+    tmp_path.write_text(json.dumps(partial))
+    tmp_path.replace(shard_path)
+    WorkJournal(journal_path).complete()
+    _logger.info(f'Shard result: "{shard_path}"')
+
+    return stats
+
+
+# _____________________________________________________________________________
+def merge_shards(count: int, cls: Type[FetchItem], app_config: AppConfig) \
+            -> Tuple[List[FetchItem], FetchStats, Dict[str, str]]:
+    """Read the partial results of all shards.  Returns the records, the statistics and the list fingerprints of the
+    records.  Download counts and bytes are summed and the run time is that of the slowest shard.  The shard URL cache
+    entries replace those of the application caches.  Raises FileNotFoundError if any shard has no result.
+    """
+    _logger.debug('merge_shards')
+    shard_paths = [shard_file_path(app_config, i, count) for i in range(count)]
+    if missing := [str(i) for i, p in enumerate(shard_paths) if not p.exists()]:
+        raise FileNotFoundError(f'Missing results for shards {", ".join(missing)} of {count}')
+
+    negative_cache = NegativeCache(app_config.negative_cache_file_path)
+    redirect_cache = RedirectCache(app_config.redirect_cache_file_path)
+    records, sizes, fingerprints, stats = [], {}, {}, FetchStats(0, 0, 0.0, 0.0, 0, 0)
+    for i, shard_path in enumerate(shard_paths):
+        partial = json.loads(shard_path.read_text())
+        shard_records = [cls.from_string(s) for s in partial['records']]
+        records.extend(shard_records)
+        shard_urls = {r.url for r in shard_records if r.to_download}
+        for cache, cache_path in zip([negative_cache, redirect_cache], shard_cache_paths(app_config, i, count)):
+            if cache_path.exists():
+                cache.merge(cache_path, shard_urls)
+        sizes.update(partial['sizes'])
+        fingerprints.update(partial.get('fingerprints', {}))
+        shard_stats = FetchStats(**partial['stats'])
+        stats.files += shard_stats.files
+        stats.bytes += shard_stats.bytes
+        stats.fetchSecs += shard_stats.fetchSecs
+        stats.runSecs = max(stats.runSecs, shard_stats.runSecs)
+        stats.failures += shard_stats.failures
+        stats.skips += shard_stats.skips
+        _logger.info(f'Shard {partial["shard"]}/{count}: {len(partial["records"])} records, '
+                     f'written {partial["written"]}')
+
+    FetchFiles.write_history(app_config.history_file_path, records, sizes, stats)
+    urls = {r.url for r in records if r.to_download}
+    negative_cache.save(urls)
+    redirect_cache.save(urls)
+    _logger.info(f'Failing URLs: {len(negative_cache)}')
+    return records, stats, fingerprints
+
+
+# _____________________________________________________________________________
+def remove_shards(count: int, app_config: AppConfig):
+    """Remove the partial results and shard URL caches once merged so they are not merged again
+    """
+    for i in range(count):
+        shard_file_path(app_config, i, count).unlink(missing_ok=True)
+        for cache_path in shard_cache_paths(app_config, i, count):
+            cache_path.unlink(missing_ok=True)
@@ -0,0 +1,131 @@
+import concurrent.futures
+import csv
+from dataclasses import dataclass
+import json
+import logging
+from pathlib import Path
+from typing import List, Optional
+
+from common.appConfig import AppConfig
+from common.cleanup import CleanOutput
+from common.common import FetchItem
+from common.fetchFiles import FetchFiles
+from common.httpClient import get_http_client
+from common.metricPrefix import to_decimal_units
+
+_logger = logging.getLogger(__name__)
+
+
+# _____________________________________________________________________________
+@dataclass
+class PlanRecord:
+    __slots__ = ['action', 'filename', 'filepath', 'url', 'bytes', 'bytesSource', 'seconds']
+    action: str
+    filename: str
+    filepath: Path
+    url: Optional[str]
+    bytes: Optional[int]
+    bytesSource: str
+    seconds: Optional[float]
+
+
+# _____________________________________________________________________________
+class SyncPlanner:
+    """Plans a synchronisation run without writing to the downloads folder.  The plan applies the same local cache
+    test as FetchFiles and the same extra file detection as CleanOutput.  Download sizes are estimated from the
+    Content-Length of a HEAD request, else from sizes recorded by previous runs, else from the local file.  Times are
+    estimated from the throughput recorded by the previous run.
+    """
+
+    # _____________________________________________________________________________
+    def __init__(self, app_config: AppConfig, is_probe: bool = True):
+        _logger.debug('__init__')
+        self._app_config = app_config
+        self._is_probe = is_probe
+
+        self._http = get_http_client(app_config.download_settings)
+
+        history_path = app_config.history_file_path
+        self._history = json.loads(history_path.read_text()) if history_path.exists() else {}
+
+    # _____________________________________________________________________________
+    def __plan_record(self, record: FetchItem) -> PlanRecord:
+        is_file_exists = record.filepath.exists()
+        if is_file_exists and FetchFiles.is_cached(record):
+            return PlanRecord('cached', record.filename, record.filepath, record.url,
+                        record.filepath.stat().st_size, 'local', 0.0)
+
+        size, source = None, ''
+        if self._is_probe and (size := self._http.content_length(record.url)) is not None:
+            source = 'content-length'
+        elif (size := self._history.get('sizes', {}).get(record.url, None)) is not None:
+            source = 'history'
+        elif is_file_exists:
+            size, source = record.filepath.stat().st_size, 'local'
+
+        return PlanRecord('update' if is_file_exists else 'create', record.filename, record.filepath, record.url,
+                    size, source, None)
+
+    # _____________________________________________________________________________
+    def __estimate_times(self, plan_records: List[PlanRecord]) -> Optional[float]:
+        """Estimate per file time from the per-stream throughput and the total time from the run throughput.
+        Returns None if no history.
+        """
+        throughput = self._history.get('throughput', None)
+        if not throughput or throughput['fetchSecs'] <= 0 or throughput['runSecs'] <= 0:
+            return None
+
+        stream_rate = throughput['bytes'] / throughput['fetchSecs']
+        run_rate = throughput['bytes'] / throughput['runSecs']
+        for pr in plan_records:
+            if pr.action in ['create', 'update'] and pr.bytes is not None:
+                pr.seconds = round(pr.bytes / stream_rate, 2)
+        total_bytes = sum(pr.bytes for pr in plan_records if pr.action in ['create', 'update'] and pr.bytes)
+        return total_bytes / run_rate
+
+    # _____________________________________________________________________________
+    def __export_plan(self, plan_records: List[PlanRecord]):
+        plan_path = self._app_config.plan_file_path
+        try:
+            with plan_path.open(mode='w', newline='') as out:
+                csv_writer = csv.writer(out, quoting=csv.QUOTE_MINIMAL)
+                csv_writer.writerow(PlanRecord.__slots__)
+                for pr in plan_records:
+                    csv_writer.writerow([pr.action, pr.filename, pr.filepath, pr.url, pr.bytes, pr.bytesSource,
+                                         pr.seconds])
+        except Exception as ex:
+            _logger.exception(f'Error writing plan file: "{plan_path}"')
+
+    # _____________________________________________________________________________
+    def process(self, records: List[FetchItem]) -> List[PlanRecord]:
+        _logger.debug('process')
+
+        FetchFiles.resolve_filepaths(records, self._app_config.downloads_path)
+        record_docs = [r for r in records if r.to_download]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+            plan_records = list(executor.map(self.__plan_record, record_docs))
+
+        # Files to be archived by CleanOutput
+        co = CleanOutput(self._app_config)
+        for file_path in co.find_extra_files({r.filepath for r in records}):
+            plan_records.append(PlanRecord('archive', file_path.name, file_path, None, file_path.stat().st_size,
+                        'local', None))
+
+        est_secs = self.__estimate_times(plan_records)
+        self.__export_plan(plan_records)
+
+        # Summary
+        fetch_plans = [pr for pr in plan_records if pr.action in ['create', 'update']]
+        fetch_bytes = sum(pr.bytes for pr in fetch_plans if pr.bytes)
+        unknown = sum(1 for pr in fetch_plans if pr.bytes is None)
+        _logger.info(f'Plan file: "{self._app_config.plan_file_path}"')
+        for action in ['create', 'update', 'cached', 'archive']:
+            _logger.info(f'- {action.capitalize() + ":":9s} {sum(1 for pr in plan_records if pr.action == action):5d}')
+        _logger.info(f'Download bytes: {to_decimal_units(fetch_bytes)}B ({unknown} unknown)')
+        if est_secs is not None:
+            mins, secs = divmod(est_secs, 60)
+            _logger.info(f'Download time:  {int(mins)}:{secs:0.1f}s (estimated)')
+        else:
+            _logger.info('Download time:  unknown (no throughput history)')
+
+        return plan_records
@@ -0,0 +1,167 @@
+"""Incremental full-text index of downloaded documents.
+
+The index is a SQLite database with an FTS5 table, ranked by bm25.  Only documents created or updated by the run,
+or not yet in the index, have their text extracted.  Documents no longer in the list, or whose file no longer exists,
+are removed from the index.
+Documents whose text cannot be extracted are recorded without content, so they are not extracted again until updated.
+
+Notes:
+- Text extraction uses the optional package pypdf.  Without it the index is not updated but can still be searched.
+- Extraction is CPU bound and runs in a process pool.  Functions used by the pool are module level so they can be
+pickled.  The pool processes are spawned, not forked, as the caller may have threads running (e.g. the log listener).
+"""
+import concurrent.futures
+import logging
+import multiprocessing
+import os
+from pathlib import Path
+import sqlite3
+import time
+from typing import List, Optional, Tuple
+
+from common.appConfig import AppConfig
+from common.common import FetchItem, Outcome, Result
+
+_logger = logging.getLogger(__name__)
+_SCHEMA = [
+    'CREATE TABLE IF NOT EXISTS documents (path TEXT PRIMARY KEY, title TEXT, size INTEGER, mtime REAL)',
+    'CREATE VIRTUAL TABLE IF NOT EXISTS content USING fts5(path UNINDEXED, title, body, tokenize="porter unicode61")'
+]
+
+try:
+    from pypdf import PdfReader
+except ImportError:
+    PdfReader = None
+
+
+# _____________________________________________________________________________
+def extract_text(filepath: str) -> Optional[str]:
+    """Returns the text of a PDF file, or None if the text cannot be extracted
+    """
+    try:
+        reader = PdfReader(filepath)
+        return '\n'.join(page.extract_text() or '' for page in reader.pages)
+    except Exception as ex:
+        return None
+
+
+# _____________________________________________________________________________
+class TextIndex:
+
+    # _____________________________________________________________________________
+    def __init__(self, index_path: Path, root_path: Path):
+        _logger.debug(f'__init__ "{index_path}"')
+        self._index_path = index_path
+        self._root_path = root_path
+        self._conn = sqlite3.connect(str(index_path))
+        for sql in _SCHEMA:
+            self._conn.execute(sql)
+
+    # _____________________________________________________________________________
+    def close(self):
+        self._conn.close()
+
+    # _____________________________________________________________________________
+    def __enter__(self):
+        return self
+
+    # _____________________________________________________________________________
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    # _____________________________________________________________________________
+    def __rel_path(self, record: FetchItem) -> str:
+        return Path(self._root_path, record.filepath).relative_to(self._root_path).as_posix()
+
+    # _____________________________________________________________________________
+    def update(self, records: List[FetchItem], workers: int = None) -> Tuple[int, int]:
+        """Index documents created or updated, or not yet indexed, and remove documents no longer listed or whose
+        file no longer exists.  Returns the number of documents indexed and removed.
+        """
+        _logger.debug('update')
+
+        record_paths = {self.__rel_path(r): r for r in records if r.to_download and r.filepath}
+        record_paths = {p: r for p, r in record_paths.items() if Path(self._root_path, p).exists()}
+        indexed_paths = {row[0] for row in self._conn.execute('SELECT path FROM documents')}
+
+        # Remove documents no longer in the list or whose file is deleted
+        removed_paths = indexed_paths - record_paths.keys()
+        with self._conn:
+            for path in removed_paths:
+                self._conn.execute('DELETE FROM documents WHERE path = ?', (path,))
+                self._conn.execute('DELETE FROM content WHERE path = ?', (path,))
+
+        # Derive documents to index from record outcome
+        index_records = {p: r for p, r in record_paths.items()
+                    if r.result in [Result.success, Result.nil]
+                    and (r.outcome in [Outcome.created, Outcome.updated] or p not in indexed_paths)}
+        if not index_records:
+            return 0, len(removed_paths)
+        if not PdfReader:
+            _logger.warning(f'Package "pypdf" not installed: {len(index_records)} documents not indexed')
+            return 0, len(removed_paths)
+
+        start_time, count, failed = time.time(), 0, 0
+        workers = workers or min(4, os.cpu_count() or 1)
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers,
+                    mp_context=multiprocessing.get_context('spawn')) as executor:
+            futures = {executor.submit(extract_text, str(Path(self._root_path, p))): p for p in index_records}
+            for future in concurrent.futures.as_completed(futures):
+                path = futures[future]
+                if (text := future.result()) is None:
+                    _logger.warning(f'Cannot extract text: "{path}"')
+                    failed += 1
+                else:
+                    count += 1
+                filepath = Path(self._root_path, path)
+                with self._conn:
+                    self._conn.execute('DELETE FROM content WHERE path = ?', (path,))
+                    if text is not None:
+                        self._conn.execute('INSERT INTO content (path, title, body) VALUES (?, ?, ?)',
+                                    (path, index_records[path].title, text))
+                    stat = filepath.stat()
+                    self._conn.execute('INSERT OR REPLACE INTO documents (path, title, size, mtime) '
+                                'VALUES (?, ?, ?, ?)', (path, index_records[path].title, stat.st_size, stat.st_mtime))
+        _logger.info(f'Text index: indexed {count}, failed {failed}, removed {len(removed_paths)} '
+                     f'in {time.time() - start_time:.1f}s')
+
+        return count, len(removed_paths)
+
+    # _____________________________________________________________________________
+    def search(self, query: str, limit: int = 20) -> List[Tuple[str, Path, float]]:
+        """Returns title, file path and rank (lower is better) of documents matching all the query words
+        """
+        match = ' '.join('"' + word.replace('"', '""') + '"' for word in query.split())
+        if not match:
+            return []
+        rows = self._conn.execute('SELECT title, path, bm25(content) AS rank FROM content WHERE content MATCH ? '
+                    'ORDER BY rank LIMIT ?', (match, limit))
+        return [(title, Path(self._root_path, path), rank) for title, path, rank in rows]
+
+
+# _____________________________________________________________________________
+def index_documents(records: List[FetchItem], app_config: AppConfig):
+    """Update the application full-text index from the fetched records.  Errors are logged and not raised as the
+    index is not required to complete the run.
+    """
+    _logger.debug('index_documents')
+    index_settings = app_config.index_settings
+    if not index_settings.get('enabled', True):
+        return
+    try:
+        with TextIndex(app_config.text_index_file_path, app_config.downloads_path) as ti:
+            ti.update(records, index_settings.get('workers', None))
+    except Exception as ex:
+        _logger.exception(f'Error updating text index: "{app_config.text_index_file_path}"')
+
+
+# _____________________________________________________________________________
+def search_documents(query: str, app_config: AppConfig):
+    _logger.debug('search_documents')
+    start_time = time.perf_counter()
+    with TextIndex(app_config.text_index_file_path, app_config.downloads_path) as ti:
+        results = ti.search(query)
+    _logger.info(f'Search "{query}": {len(results)} documents in {(time.perf_counter() - start_time) * 1000:.1f}ms')
+    for title, path, rank in results:
+        _logger.info(f'{rank:8.2f}  {title}')
+        _logger.info(f'          "{path}"')
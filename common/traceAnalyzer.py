@@ -0,0 +1,144 @@
+"""Reports from the fetch traces of many runs.
+
+Reports are:
+- runs: per run, the records, bytes, run time and download latency percentiles, to show trends over weeks
+- stages: per stage, the latency percentiles over all runs, and the stages of the critical path (the record done
+last) of each run
+- hosts: per host, the number of downloads, latency percentiles and throughput, slowest first
+"""
+from collections import defaultdict
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Sequence
+
+from common.appConfig import AppConfig
+from common.metricPrefix import to_decimal_units
+
+_logger = logging.getLogger(__name__)
+_PERCENTILES = [50, 90, 99]
+_MAX_HOSTS = 10
+
+
+# _____________________________________________________________________________
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Returns the nearest rank percentile of the values, or 0 if no values
+    """
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[max(0, min(len(values) - 1, round(pct / 100 * len(values)) - 1))]
+
+
+# _____________________________________________________________________________
+def load_runs(trace_paths: List[Path], since: str = None, until: str = None) -> Dict[str, List[Mapping[str, Any]]]:
+    """Returns the trace events by run, for runs started in the range since to until inclusive
+    """
+    runs = defaultdict(list)
+    for trace_path in trace_paths:
+        with trace_path.open(mode='r', encoding='utf-8') as fp:
+            for line in fp:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                run = event['run']
+                if (since and run < since) or (until and run[:len(until)] > until):
+                    continue
+                runs[run].append(event)
+    return dict(sorted(runs.items()))
+
+
+# _____________________________________________________________________________
+def record_stages(events: List[Mapping[str, Any]]) -> Dict[str, Dict[str, float]]:
+    """Returns the stage seconds of each record of a run: wait (queued to start), download, validate and total
+    (queued to done)
+    """
+    records = defaultdict(lambda: {'wait': 0.0, 'download': 0.0, 'validate': 0.0, 'total': 0.0})
+    times = defaultdict(dict)
+    for e in filter(lambda e: e['name'], events):
+        name, event = e['name'], e['event']
+        if event in ['queued', 'start', 'done']:
+            times[name][event] = e['ts']
+        elif event == 'download':
+            records[name]['download'] += e['secs']
+        elif event == 'validate':
+            records[name]['validate'] = e['secs']
+    for name, t in times.items():
+        if 'queued' in t and 'start' in t:
+            records[name]['wait'] = t['start'] - t['queued']
+        if 'queued' in t and 'done' in t:
+            records[name]['total'] = t['done'] - t['queued']
+            records[name]['doneTs'] = t['done']
+    return dict(records)
+
+
+# _____________________________________________________________________________
+def _format_percentiles(values: Sequence[float]) -> str:
+    return '  '.join(f'p{p} {percentile(values, p):6.2f}s' for p in _PERCENTILES) + \
+        f'  max {max(values, default=0.0):6.2f}s'
+
+
+# _____________________________________________________________________________
+def report_runs(runs: Mapping[str, List[Mapping[str, Any]]]):
+    _logger.info('Runs')
+    for run, events in runs.items():
+        end = next((e for e in events if e['event'] == 'end'), {})
+        secs = [e['secs'] for e in events if e['event'] == 'download' and e['status'] == 200]
+        _logger.info(f'{run}  files {end.get("files", len(secs)):5d}  {to_decimal_units(end.get("bytes", 0)):>5s}B  '
+                     f'run {end.get("runSecs", 0.0):7.1f}s  download {_format_percentiles(secs)}')
+
+
+# _____________________________________________________________________________
+def report_stages(runs: Mapping[str, List[Mapping[str, Any]]]):
+    _logger.info('Stages')
+    all_stages = defaultdict(list)
+    critical_paths = []
+    for run, events in runs.items():
+        records = record_stages(events)
+        for stages in records.values():
+            for stage in ['wait', 'download', 'validate', 'total']:
+                all_stages[stage].append(stages[stage])
+        if done := [(s['doneTs'], n, s) for n, s in records.items() if 'doneTs' in s]:
+            critical_paths.append((run, *max(done)[1:]))
+
+    for stage, values in all_stages.items():
+        _logger.info(f'{stage:10s}  {_format_percentiles(values)}')
+    _logger.info('Critical path')
+    for run, name, stages in critical_paths:
+        _logger.info(f'{run}  wait {stages["wait"]:6.2f}s  download {stages["download"]:6.2f}s  '
+                     f'validate {stages["validate"]:6.2f}s  total {stages["total"]:6.2f}s  "{name}"')
+
+
+# _____________________________________________________________________________
+def report_hosts(runs: Mapping[str, List[Mapping[str, Any]]]):
+    _logger.info('Hosts')
+    hosts = defaultdict(list)
+    for events in runs.values():
+        for e in filter(lambda e: e['event'] == 'download' and e['status'] == 200, events):
+            hosts[e['host']].append(e)
+
+    rows = []
+    for host, events in hosts.items():
+        secs = [e['secs'] for e in events]
+        rate = sum(e['bytes'] for e in events) / max(sum(secs), 1e-6)
+        rows.append((percentile(secs, 90), host, secs, rate))
+    for _, host, secs, rate in sorted(rows, reverse=True)[:_MAX_HOSTS]:
+        _logger.info(f'{host:30s}  count {len(secs):5d}  {_format_percentiles(secs)}  '
+                     f'{to_decimal_units(round(rate)):>5s}B/s')
+
+
+# _____________________________________________________________________________
+def report_traces(app_config: AppConfig, since: str = None, until: str = None):
+    """Log the reports of the application traces, for runs started in the range since to until inclusive
+    """
+    _logger.debug('report_traces')
+    trace_path = app_config.trace_file_path
+    trace_paths = sorted(trace_path.parent.glob(f'{app_config.name}.trace.*.jsonl'))
+    runs = load_runs(trace_paths, since, until)
+    _logger.info(f'Traces: {len(trace_paths)} files, {len(runs)} runs')
+    if not runs:
+        return
+    report_runs(runs)
+    report_stages(runs)
+    report_hosts(runs)
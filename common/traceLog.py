@@ -0,0 +1,88 @@
+"""Machine readable trace of the fetch of each record.
+
+The trace is a JSON lines file of events, one per record per stage, for aggregating across runs.  Each event has the
+run id ("run"), event time ("ts"), stage ("event") and record filename ("name").  The run id is the run start time,
+to the millisecond, and process id, so runs sort by start time and concurrent runs, such as shards, are told apart.
+Record stages are:
+- queued    record submitted to the download threads
+- start     record taken by a download thread
+- request   HTTP request, from the HttpClient hook, with host, status, seconds and retries
+- download  HTTP download, from the HttpClient hook, with final host, status, bytes and seconds
+- validate  PDF validation with seconds from submission and whether valid
+- done      record outcome and result
+The run itself has events "run" at the start, with the number of records, and "end" with the fetch statistics.
+
+A writer with no trace file path writes nothing so callers need not test whether tracing is enabled.
+"""
+from datetime import datetime
+import json
+import logging
+import os
+from pathlib import Path
+import threading
+import time
+from typing import Any, Mapping, Optional
+from urllib import parse
+
+from common.common import FetchItem
+
+_logger = logging.getLogger(__name__)
+
+
+# _____________________________________________________________________________
+class TraceWriter(object):
+
+    # _____________________________________________________________________________
+    def __init__(self, trace_path: Optional[Path]):
+        _logger.debug(f'__init__ "{trace_path}"')
+        self._trace_path = trace_path
+        self._run = f'{datetime.now().isoformat(timespec="milliseconds")}-{os.getpid()}'
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._fp = None
+
+    # _____________________________________________________________________________
+    @property
+    def is_enabled(self) -> bool:
+        return self._trace_path is not None
+
+    # _____________________________________________________________________________
+    def open(self):
+        if self._trace_path:
+            self._trace_path.parent.mkdir(parents=True, exist_ok=True)
+            self._fp = self._trace_path.open(mode='a', encoding='utf-8')
+
+    # _____________________________________________________________________________
+    def close(self):
+        with self._lock:
+            if self._fp:
+                self._fp.close()
+                self._fp = None
+
+    # _____________________________________________________________________________
+    def event(self, event: str, record: FetchItem = None, **info):
+        """Write an event for the record, else the record being fetched by the thread
+        """
+        if not self._fp:
+            return
+        name = record.filename if record else getattr(self._local, 'name', None)
+        entry = {'run': self._run, 'ts': round(time.time(), 3), 'event': event, 'name': name, **info}
+        line = json.dumps(entry, default=str) + '\n'
+        with self._lock:
+            if self._fp:
+                self._fp.write(line)
+
+    # _____________________________________________________________________________
+    def begin(self, record: FetchItem):
+        """Associate the thread with the record so HTTP events are traced for the record
+        """
+        self._local.name = record.filename
+        self.event('start', record)
+
+    # _____________________________________________________________________________
+    def hook(self, event: str, info: Mapping[str, Any]):
+        """HttpClient hook for the "request" and "download" events
+        """
+        if event in ['request', 'download']:
+            self.event(event, host=parse.urlsplit(info['url']).netloc,
+                       **{k: v for k, v in info.items() if k != 'url'})
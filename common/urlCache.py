@@ -0,0 +1,179 @@
+"""Persisted caches of URL state carried between runs.
+
+Each cache is a JSON file mapping URL to an entry.  The cache is loaded once, updated in memory by the fetch threads
+and saved once at the end of the run.  Entries for URLs no longer in the list are pruned on save.  A shard of the
+list saves its entries to a file of its own, merged into the cache by the merge step.
+"""
+import json
+import logging
+from pathlib import Path
+import threading
+import time
+from typing import Any, Dict, Iterable, Mapping, Optional
+
+from common.common import FetchItem
+
+_logger = logging.getLogger(__name__)
+
+
+# _____________________________________________________________________________
+class UrlCache(object):
+
+    # _____________________________________________________________________________
+    def __init__(self, cache_file_path: Path):
+        _logger.debug(f'__init__ "{cache_file_path}"')
+        self._cache_file_path = cache_file_path
+        self._lock = threading.Lock()
+        self._entries = self.__read_entries(cache_file_path)
+
+    # _____________________________________________________________________________
+    @staticmethod
+    def __read_entries(cache_file_path: Path) -> Dict[str, Dict[str, Any]]:
+        if cache_file_path.exists():
+            try:
+                return json.loads(cache_file_path.read_text())
+            except ValueError:
+                _logger.warning(f'Cannot read URL cache, ignored: "{cache_file_path}"')
+        return {}
+
+    # _____________________________________________________________________________
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # _____________________________________________________________________________
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._entries.get(url, None)
+
+    # _____________________________________________________________________________
+    def put(self, url: str, entry: Mapping[str, Any]):
+        with self._lock:
+            self._entries[url] = dict(entry)
+
+    # _____________________________________________________________________________
+    def remove(self, url: str):
+        with self._lock:
+            self._entries.pop(url, None)
+
+    # _____________________________________________________________________________
+    def merge(self, cache_file_path: Path, urls: Iterable[str]):
+        """Replace the entries for the URLs by those of another cache file, such as the file saved by a shard
+        """
+        urls = set(urls)
+        entries = {k: v for k, v in self.__read_entries(cache_file_path).items() if k in urls}
+        with self._lock:
+            self._entries = {k: v for k, v in self._entries.items() if k not in urls}
+            self._entries.update(entries)
+
+    # _____________________________________________________________________________
+    def save(self, urls: Iterable[str] = None, cache_file_path: Path = None):
+        """Write the cache, to cache_file_path if given, keeping only entries for the URLs if given
+        """
+        cache_file_path = cache_file_path or self._cache_file_path
+        with self._lock:
+            if urls is not None:
+                urls = set(urls)
+                self._entries = {k: v for k, v in self._entries.items() if k in urls}
+            entries = dict(self._entries)
+        try:
+            tmp_path = cache_file_path.with_suffix('.tmp')
+            tmp_path.write_text(json.dumps(entries, indent=2))
+            tmp_path.replace(cache_file_path)
+        except OSError:
+            _logger.exception(f'Error writing URL cache: "{cache_file_path}"')
+
+
+# _____________________________________________________________________________
+class RedirectCache(UrlCache):
+    """Final URL, after redirects, of URLs that redirect.  Entries expire after "ttlSecs".
+    """
+
+    # _____________________________________________________________________________
+    def __init__(self, cache_file_path: Path, settings: Mapping[str, Any] = None):
+        super().__init__(cache_file_path)
+        settings = settings or {}
+        self._ttl_secs = int(settings.get('ttlSecs', 604800))
+
+    # _____________________________________________________________________________
+    def location(self, url: str) -> Optional[str]:
+        """Returns the final URL if cached and not expired, else None
+        """
+        if not (entry := self.get(url)):
+            return None
+        if time.time() - entry['resolved'] > self._ttl_secs:
+            self.remove(url)
+            return None
+        return entry['location']
+
+    # _____________________________________________________________________________
+    def put_location(self, url: str, location: str):
+        self.put(url, {'location': location, 'resolved': round(time.time())})
+
+
+# _____________________________________________________________________________
+class NegativeCache(UrlCache):
+    """URLs failing with a persistent HTTP status, such as 404, and when to next try them.  The wait doubles with
+    each consecutive failure, from "backoffSecs" up to "maxBackoffSecs".  An entry is cleared when the URL succeeds
+    or the record remote date changes.
+    """
+
+    # _____________________________________________________________________________
+    def __init__(self, cache_file_path: Path, settings: Mapping[str, Any] = None):
+        super().__init__(cache_file_path)
+        settings = settings or {}
+        self._statuses = set(settings.get('statuses', [403, 404, 410]))
+        self._backoff_secs = int(settings.get('backoffSecs', 21600))
+        self._max_backoff_secs = int(settings.get('maxBackoffSecs', 2592000))
+
+    # _____________________________________________________________________________
+    def is_negative(self, status: int) -> bool:
+        return status in self._statuses
+
+    # _____________________________________________________________________________
+    def backoff(self, record: FetchItem) -> Optional[Dict[str, Any]]:
+        """Returns the entry if the record URL is to be skipped, else None.  The entry is cleared if the record
+        remote date has changed.
+        """
+        if not (entry := self.get(record.url)):
+            return None
+        if entry['dateRemote'] != record.dateRemote.isoformat():
+            self.remove(record.url)
+            return None
+        return entry if time.time() < entry['retryAfter'] else None
+
+    # _____________________________________________________________________________
+    def add_failure(self, record: FetchItem, status: int) -> Dict[str, Any]:
+        failures = (entry['failures'] if (entry := self.get(record.url)) else 0) + 1
+        wait_secs = min(self._backoff_secs * 2 ** (failures - 1), self._max_backoff_secs)
+        entry = {'status': status, 'failures': failures, 'dateRemote': record.dateRemote.isoformat(),
+                 'lastFailure': round(time.time()), 'retryAfter': round(time.time() + wait_secs)}
+        self.put(record.url, entry)
+        return entry
+
+
+# _____________________________________________________________________________
+class PageSizeCache(UrlCache):
+    """Largest list page size honoured by the source, by list URL and directory.  Entries expire after "ttlSecs" so
+    a raised limit is found.
+    """
+
+    # _____________________________________________________________________________
+    def __init__(self, cache_file_path: Path, settings: Mapping[str, Any] = None):
+        super().__init__(cache_file_path)
+        settings = settings or {}
+        self._ttl_secs = int(settings.get('ttlSecs', 2592000))
+
+    # _____________________________________________________________________________
+    def size(self, url: str) -> Optional[int]:
+        """Returns the page size if cached and not expired, else None
+        """
+        if not (entry := self.get(url)):
+            return None
+        if time.time() - entry['probed'] > self._ttl_secs:
+            self.remove(url)
+            return None
+        return entry['size']
+
+    # _____________________________________________________________________________
+    def put_size(self, url: str, size: int):
+        self.put(url, {'size': size, 'probed': round(time.time())})
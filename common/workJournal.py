@@ -0,0 +1,97 @@
+"""Journal of record fetch state so an interrupted run resumes instead of restarting.
+
+The journal is a JSON lines file appended, and flushed, as each record starts fetching and when it is done with its
+outcome and result.  The last entry for a record is its state.  A run that completes removes the journal, thus a
+journal found at the start of a run is from an interrupted run and records done by it are not fetched again.
+
+Notes:
+- Each line is flushed to the operating system, not synced to disk, so the journal survives the process dying but
+not necessarily the host.
+- A line torn by the process dying is ignored.
+"""
+from datetime import datetime
+import json
+import logging
+from pathlib import Path
+import threading
+from typing import Dict, Tuple, Any, Mapping
+
+from common.appConfig import AppConfig
+from common.common import FetchItem, Outcome, Result
+
+_logger = logging.getLogger(__name__)
+
+
+# _____________________________________________________________________________
+class WorkJournal:
+
+    # _____________________________________________________________________________
+    def __init__(self, journal_path: Path):
+        _logger.debug(f'__init__ "{journal_path}"')
+        self._journal_path = journal_path
+        self._lock = threading.Lock()
+        self._fp = None
+
+    # _____________________________________________________________________________
+    def __read(self) -> Dict[str, Tuple[Outcome, Result]]:
+        done = {}
+        with self._journal_path.open(mode='r', encoding='utf-8') as fp:
+            for line in fp:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if (filename := entry.get('filename', None)) is None:
+                    continue
+                if entry['state'] == 'done':
+                    done[filename] = Outcome[entry['outcome']], Result[entry['result']]
+                else:
+                    done.pop(filename, None)
+        return done
+
+    # _____________________________________________________________________________
+    def open(self) -> Dict[str, Tuple[Outcome, Result]]:
+        """Open the journal for writing.  Returns the outcome and result, by filename, of records done by an
+        interrupted run.
+        """
+        done = self.__read() if self._journal_path.exists() else {}
+        self._journal_path.parent.mkdir(parents=True, exist_ok=True)
+        self._fp = self._journal_path.open(mode='a' if done else 'w', encoding='utf-8')
+        self.__write({'started': datetime.now().isoformat(timespec='seconds'), 'resumed': len(done)})
+        return done
+
+    # _____________________________________________________________________________
+    def close(self):
+        with self._lock:
+            if self._fp:
+                self._fp.close()
+                self._fp = None
+
+    # _____________________________________________________________________________
+    def complete(self):
+        """Remove the journal as the run completed
+        """
+        self.close()
+        self._journal_path.unlink(missing_ok=True)
+
+    # _____________________________________________________________________________
+    def __write(self, entry: Mapping[str, Any]):
+        with self._lock:
+            if self._fp:
+                self._fp.write(json.dumps(entry) + '\n')
+                self._fp.flush()
+
+    # _____________________________________________________________________________
+    def fetching(self, record: FetchItem):
+        self.__write({'filename': record.filename, 'state': 'fetching'})
+
+    # _____________________________________________________________________________
+    def done(self, record: FetchItem):
+        self.__write({'filename': record.filename, 'state': 'done', 'outcome': record.outcome.name,
+                      'result': record.result.name})
+
+
+# _____________________________________________________________________________
+def complete_journal(app_config: AppConfig):
+    _logger.debug('complete_journal')
+    WorkJournal(app_config.journal_file_path).complete()
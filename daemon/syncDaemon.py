@@ -0,0 +1,232 @@
+"""Long running synchronisation of the collections.
+
+The daemon keeps the HTTP connection pools and application configurations in memory and checks each collection on
+its own cache age.  A check is a single request for the first list page, compared with the cached first page.  Only
+if the list changed is the collection synchronised, which fetches the list and downloads the changed files.
+
+The application configuration is built again for each synchronisation, so files named by date, such as the data
+and trace files, follow the date, and configuration changes apply.  All collections share the process HTTP client,
+created with the download pool settings of the first collection.  The rate limit is set by each synchronisation,
+and as collections are synchronised one at a time, each synchronisation runs with its own rate limit.
+
+A local HTTP server reports:
+- /health   200 if the scheduler is running, else 503
+- /status   the state of each collection and the connection pool statistics
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import logging.config
+from pathlib import Path
+import signal
+import threading
+import time
+from types import ModuleType
+from typing import Any, Dict, List, Optional, Type
+
+from common.appConfig import AppConfig
+from common.common import initialize_logger
+from common.fetchList import FetchList
+from common.httpClient import get_http_client
+
+_logger = logging.getLogger(__name__)
+_MIN_INTERVAL_SEC = 60
+
+
+# _____________________________________________________________________________
+@dataclass
+class CollectionState:
+    __slots__ = ['name', 'app', 'app_path', 'config_cls', 'list_cls', 'intervalSecs', 'nextCheck', 'lastCheck',
+                'lastSync', 'checks', 'syncs', 'lastError', 'isRunning']
+    name: str
+    app: ModuleType
+    app_path: Path
+    config_cls: Type[AppConfig]
+    list_cls: Type[FetchList]
+    intervalSecs: int
+    nextCheck: float
+    lastCheck: Optional[datetime]
+    lastSync: Optional[datetime]
+    checks: int
+    syncs: int
+    lastError: Optional[str]
+    isRunning: bool
+
+    # _____________________________________________________________________________
+    def build_config(self) -> AppConfig:
+        return self.config_cls(self.app_path, self.app_path.parents[1])
+
+    # _____________________________________________________________________________
+    def to_status(self) -> Dict[str, Any]:
+        return {'intervalSecs': self.intervalSecs,
+                'nextCheck': datetime.fromtimestamp(self.nextCheck).isoformat(timespec='seconds'),
+                'lastCheck': self.lastCheck.isoformat(timespec='seconds') if self.lastCheck else None,
+                'lastSync': self.lastSync.isoformat(timespec='seconds') if self.lastSync else None,
+                'checks': self.checks, 'syncs': self.syncs, 'lastError': self.lastError, 'isRunning': self.isRunning}
+
+
+# _____________________________________________________________________________
+def load_collection(name: str, min_interval: int) -> CollectionState:
+    """Load the application module, configuration and list class of a collection
+    """
+    if name == 'whitepapers':
+        from whitepapers import getWhitepapers as app
+        from whitepapers.whitepaperAppConfig import WhitepaperAppConfig as config_cls
+        from whitepapers.fetchWhitepaperList import FetchWhitepaperList as list_cls
+    elif name == 'answers':
+        from answers import getAnswers as app
+        from answers.answersAppConfig import AnswersAppConfig as config_cls
+        from answers.fetchAnswersList import FetchAnswersList as list_cls
+    elif name == 'builders':
+        from builders import getBuilders as app
+        from builders.buildersAppConfig import BuildersAppConfig as config_cls
+        from builders.fetchBuildersList import FetchBuildersList as list_cls
+    else:
+        raise ValueError(f'Unknown collection "{name}"')
+
+    app_path = Path(app.__file__)
+    app_config = config_cls(app_path, app_path.parents[1])
+    interval = max(app_config.cache_age_sec, min_interval)
+    return CollectionState(name, app, app_path, config_cls, list_cls, interval, time.time(), None, None, 0, 0, None,
+                False)
+
+
+# _____________________________________________________________________________
+class SyncDaemon:
+
+    # _____________________________________________________________________________
+    def __init__(self, daemon_settings: Dict[str, Any]):
+        _logger.debug('__init__')
+        min_interval = int(daemon_settings.get('minIntervalSec', _MIN_INTERVAL_SEC))
+        self._collections = [load_collection(n, min_interval)
+                    for n in daemon_settings.get('collections', ['whitepapers', 'answers', 'builders'])]
+        self._started = datetime.now()
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._scheduler = None
+
+    # _____________________________________________________________________________
+    @property
+    def is_healthy(self) -> bool:
+        return self._scheduler is not None and self._scheduler.is_alive()
+
+    # _____________________________________________________________________________
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            collections = {c.name: c.to_status() for c in self._collections}
+        return {'started': self._started.isoformat(timespec='seconds'), 'healthy': self.is_healthy,
+                'connections': str(get_http_client().pool_stats), 'collections': collections}
+
+    # _____________________________________________________________________________
+    def __check(self, collection: CollectionState):
+        """Probe the collection list and synchronise the collection if changed
+        """
+        _logger.debug(f'__check {collection.name}')
+        try:
+            app_config = collection.build_config()
+            fetch_list = collection.list_cls(app_config)
+            is_changed = fetch_list.probe_list()
+            with self._lock:
+                collection.checks += 1
+                collection.lastCheck = datetime.now()
+                collection.lastError = None
+            _logger.info(f'Check {collection.name}: {"changed" if is_changed else "unchanged"}')
+            if is_changed:
+                with self._lock:
+                    collection.isRunning = True
+                fetch_list.expire_cache()
+                collection.app.process(app_config)
+                with self._lock:
+                    collection.syncs += 1
+                    collection.lastSync = datetime.now()
+        except Exception as ex:
+            _logger.exception(f'Check {collection.name} error')
+            with self._lock:
+                collection.lastError = f'{type(ex).__name__}: {ex}'
+        finally:
+            with self._lock:
+                collection.isRunning = False
+                collection.nextCheck = time.time() + collection.intervalSecs
+
+    # _____________________________________________________________________________
+    def __schedule(self):
+        _logger.debug('__schedule')
+        while not self._stop_event.is_set():
+            collection = min(self._collections, key=lambda c: c.nextCheck)
+            if (wait := collection.nextCheck - time.time()) > 0:
+                self._stop_event.wait(wait)
+                continue
+            self.__check(collection)
+
+    # _____________________________________________________________________________
+    def start(self):
+        self._scheduler = threading.Thread(target=self.__schedule, name='scheduler', daemon=True)
+        self._scheduler.start()
+
+    # _____________________________________________________________________________
+    def stop(self):
+        """Stop the scheduler after the check in progress
+        """
+        self._stop_event.set()
+        if self._scheduler:
+            self._scheduler.join()
+
+
+# _____________________________________________________________________________
+def status_handler(daemon: SyncDaemon) -> Type[BaseHTTPRequestHandler]:
+
+    class StatusHandler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            if self.path == '/health':
+                code, body = (200, {'status': 'ok'}) if daemon.is_healthy else (503, {'status': 'stopped'})
+            elif self.path == '/status':
+                code, body = 200, daemon.status()
+            else:
+                code, body = 404, {'error': 'not found'}
+            data = json.dumps(body, indent=2).encode('utf-8')
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format: str, *args: List[Any]):
+            _logger.debug(f'{self.address_string()} {format % args}')
+
+    return StatusHandler
+
+
+# _____________________________________________________________________________
+def main():
+    start_time = time.time()
+    app_path = Path(__file__)
+    initialize_logger(app_path)
+    config_settings = json.loads(app_path.with_suffix('.config.json').read_text())
+    http_settings = config_settings.get('http', {})
+
+    daemon = SyncDaemon(config_settings)
+    server = ThreadingHTTPServer((http_settings.get('host', '127.0.0.1'), int(http_settings.get('port', 8780))),
+                status_handler(daemon))
+    server_thread = threading.Thread(target=server.serve_forever, name='status', daemon=True)
+    server_thread.start()
+    signal.signal(signal.SIGTERM, lambda signum, frame: server.shutdown())
+    _logger.info(f'Status: http://{server.server_address[0]}:{server.server_address[1]}/status')
+    try:
+        daemon.start()
+        while server_thread.is_alive():
+            server_thread.join(1.0)
+    except KeyboardInterrupt:
+        _logger.info('Interrupted')
+    finally:
+        server.shutdown()
+        daemon.stop()
+        server.server_close()
+        mins, secs = divmod(timedelta(seconds=time.time() - start_time).total_seconds(), 60)
+        _logger.info(f'Run time: {int(mins)}:{secs:0.1f}s')
+
+
+# _____________________________________________________________________________
+if __name__ == '__main__':
+    main()
@@ -5,11 +5,19 @@ import time
 from typing import List
 
 from common.appConfig import AppConfig
+from common.archiveStore import restore_files
 from common.cleanup import CleanOutput
-from common.common import initialize_logger
+from common.listSnapshot import ListDelta, ListSnapshot
+from common.common import initialize_logger, parse_arguments
+from common.metadataIndex import update_metadata, query_metadata
 from common.reporting import Reporting
+from common.shardSync import fetch_shard, merge_shards, remove_shards
 from common.logTools import MessageFormatter, PathFileHandler
 from common.fetchFiles import FetchFiles
+from common.syncPlan import SyncPlanner
+from common.textIndex import index_documents, search_documents
+from common.traceAnalyzer import report_traces
+from common.workJournal import complete_journal
 
 from whitepapers.fetchWhitepaperList import FetchWhitepaperList
 from whitepapers.whitepaperAppConfig import WhitepaperAppConfig
@@ -21,12 +29,12 @@ _CSV_BACKUP_SUFFIX = '.bak.csv'
 
 
 # _____________________________________________________________________________
-def clean_output(fetch_records: List[WhitepaperItem], app_config: AppConfig):
+def clean_output(fetch_records: List[WhitepaperItem], app_config: AppConfig, list_delta: ListDelta = None):
     _logger.debug('clean_output')
 
     co = CleanOutput(app_config)
     fetch_paths = {r.filepath for r in fetch_records}
-    delete_records = co.process(fetch_paths)
+    delete_records = co.process(fetch_paths, list_delta.stale_paths if list_delta else None)
     return delete_records
 
 
@@ -36,6 +44,7 @@ def fetch_files(fetch_records: List[WhitepaperItem], app_config: AppConfig):
 
     fd = FetchFiles(app_config)
     fd.process(fetch_records)
+    return fd.stats
 
 
 # _____________________________________________________________________________
@@ -47,24 +56,72 @@ def build_record_list(app_config: AppConfig):
 
 
 # _____________________________________________________________________________
-def process(app_config: AppConfig):
+def process(app_config: AppConfig, is_reconcile: bool = False):
     _logger.debug('process')
     _logger.info(f'Output path: "{app_config.downloads_path}"')
 
-    fetch_records = build_record_list(app_config)
+    fdl = FetchWhitepaperList(app_config)
+    fetch_records = fdl.build_list()
+    snapshot = ListSnapshot(app_config, fdl.fingerprints)
+    list_delta = snapshot.diff(fetch_records, is_reconcile)
+    delete_records, fetch_stats = [], None
+    try:
+        fetch_stats = fetch_files(fetch_records, app_config)
+        index_documents(fetch_records, app_config)
+        delete_records = clean_output(fetch_records, app_config, list_delta)
+    finally:
+        reporting = Reporting(fetch_records, WhitepaperItem, delete_records, app_config, fetch_stats)
+        reporting.export_fetch_results()
+        reporting.export_extras_results()
+        update_metadata(fetch_records, WhitepaperItem, app_config)
+        _logger.info('\n' + reporting.build_summary())
+    snapshot.save(fetch_records)
+    complete_journal(app_config)
+
+
+# _____________________________________________________________________________
+def plan(app_config: AppConfig, is_probe: bool = True):
+    _logger.debug('plan')
+    _logger.info(f'Output path: "{app_config.downloads_path}"')
+
+    fdl = FetchWhitepaperList(app_config)
+    fetch_records = fdl.build_list()
+    SyncPlanner(app_config, is_probe).process(fetch_records)
+
+
+# _____________________________________________________________________________
+def shard(app_config: AppConfig, index: int, count: int):
+    _logger.debug('shard')
+    _logger.info(f'Output path: "{app_config.downloads_path}"')
+
+    fdl = FetchWhitepaperList(app_config)
+    fetch_records = fdl.build_list()
+    fetch_shard(fetch_records, index, count, app_config, fdl.fingerprints)
+
+
+# _____________________________________________________________________________
+def merge(app_config: AppConfig, count: int):
+    _logger.debug('merge')
+    _logger.info(f'Output path: "{app_config.downloads_path}"')
+
+    fetch_records, fetch_stats, fingerprints = merge_shards(count, WhitepaperItem, app_config)
     delete_records = []
     try:
-        fetch_files(fetch_records, app_config)
+        index_documents(fetch_records, app_config)
         delete_records = clean_output(fetch_records, app_config)
     finally:
-        reporting = Reporting(fetch_records, WhitepaperItem, delete_records, app_config)
+        reporting = Reporting(fetch_records, WhitepaperItem, delete_records, app_config, fetch_stats)
         reporting.export_fetch_results()
         reporting.export_extras_results()
+        update_metadata(fetch_records, WhitepaperItem, app_config)
         _logger.info('\n' + reporting.build_summary())
+    ListSnapshot(app_config, fingerprints).save(fetch_records)
+    remove_shards(count, app_config)
 
 
 # _____________________________________________________________________________
 def main():
+    args = parse_arguments()
     start_time = time.time()
     app_path = Path(__file__)
     try:
@@ -73,7 +130,23 @@ def main():
         initialize_logger(app_path, start_datetime)
 
         # Run application
-        process(WhitepaperAppConfig(app_path, app_path.parents[1]))
+        app_config = WhitepaperAppConfig(app_path, app_path.parents[1])
+        if args.plan:
+            plan(app_config, args.probe)
+        elif args.search:
+            search_documents(args.search, app_config)
+        elif args.restore:
+            restore_files(args.restore, args.restore_to, app_config)
+        elif args.shard:
+            shard(app_config, *args.shard)
+        elif args.merge:
+            merge(app_config, args.merge)
+        elif args.trace_report:
+            report_traces(app_config, args.since, args.until)
+        elif args.where or args.since or args.until:
+            query_metadata(args.where, args.since, args.until, WhitepaperItem, app_config)
+        else:
+            process(app_config, args.reconcile)
     except Exception as ex:
         _logger.exception('Catch all exception')
     finally:
@@ -27,10 +27,20 @@ class WhitepaperAppConfig(AppConfig):
         # Remote URL
         self._source_url = remote_settings['urlLoc']
         self._source_parameters = remote_settings['urlParameters']
+        self._sources = remote_settings.get('sources', [])
 
         # Cache
         self._cache_age_sec = int(cache_settings.get('age', 300))
 
+        # List
+        self._list_settings = config_settings.get('list', {})
+
+        # Download
+        self._download_settings = config_settings.get('download', {})
+
+        # Full-text index
+        self._index_settings = config_settings.get('index', {})
+
     # _____________________________________________________________________________
     @property
     def source_url(self):